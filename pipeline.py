@@ -1,6 +1,7 @@
 # ─── Load Libraries ──────────────────────────────────────────────────────────
 import os
 import sys
+import importlib
 import subprocess
 import argparse
 
@@ -13,7 +14,7 @@ from utils.logger_helper import setup_loggers  # Handles log file and console lo
 from utils.config_loader import load_yaml_files  # Loads configuration settings from YAML files
 
 # ─── Load Configuration ──────────────────────────────────────────────────────
-CONFIG_FILES = ["config/models.yaml"]
+CONFIG_FILES = ["config/paths.yaml", "config/models.yaml"]
 config = load_yaml_files(CONFIG_FILES)  # Load YAML configs
 
 # Get the list of available models from config.yaml
@@ -23,39 +24,52 @@ REGRESSION_MODELS = [m for m in AVAILABLE_MODELS if config["models"][m]["type"]
 
 # ─── Setup Loggers ───────────────────────────────────────────────────────────
 LOG_FILENAME = "pipeline"
-rich_logger, file_logger = setup_loggers(LOG_FILENAME)
+logger, file_logger = setup_loggers(LOG_FILENAME)
 
 # ─── Utility Functions ───────────────────────────────────────────────────────
+def setup_directories():
+    """Creates every directory referenced in paths.yaml once, before any step runs."""
+    for path in config["paths"].values():
+        # File paths (with an extension) need their parent directory; directory paths are created as-is
+        directory = os.path.dirname(path) if os.path.splitext(path)[1] else path
+        os.makedirs(directory, exist_ok=True)
+
 def run_step(command):
-    """Runs a shell command and handles errors."""
-    rich_logger.info(f"Executing: {command}")
-    file_logger.info(f"Executing: {command}")
-    result = subprocess.run(command, shell=True)
-    if result.returncode != 0:
-        rich_logger.error(f"Error executing: {command}")
-        file_logger.error(f"Error executing: {command}")
+    """Runs a command given as an argv list (no intermediate shell) and handles errors."""
+    logger.info("Executing: %s", " ".join(command))
+    try:
+        subprocess.run(command, check=True)
+    except (OSError, subprocess.CalledProcessError) as e:
+        logger.error("Error executing %s: %s", " ".join(command), e)
+        sys.exit(1)
+
+def run_module(module_name):
+    """Imports a pipeline stage and runs its main() in the current process."""
+    logger.info("Executing: %s", module_name)
+    try:
+        importlib.import_module(module_name).main()
+    except (Exception, SystemExit) as e:
+        logger.error("Error executing %s: %s", module_name, e)
         sys.exit(1)
 
 def run_data_steps():
-    """Runs all data preprocessing steps in a defined order."""
+    """Runs all data preprocessing steps in a defined order within this process."""
     data_steps = [
-        "python src/data_processing/download_flight_data.py",
-        "python src/data_processing/download_noaa_data.py",
-        "python src/data_processing/extract_noaa_data.py",
-        "python src/data_processing/extract_flight_data.py",
-        "python src/data_processing/process_noaa_data.py",
-        "python src/data_processing/process_flight_data.py",
-        "python src/data_processing/final_data.py",
+        "src.data_processing.download_flight_data",
+        "src.data_processing.download_noaa_data",
+        "src.data_processing.extract_noaa_data",
+        "src.data_processing.extract_flight_data",
+        "src.data_processing.process_noaa_data",
+        "src.data_processing.process_flight_data",
+        "src.data_processing.final_data",
     ]
 
-    rich_logger.info("Running all data processing steps in sequence")
-    file_logger.info("Running all data processing steps in sequence")
+    logger.info("Running all data processing steps in sequence")
 
     for step in data_steps:
-        run_step(step)
+        run_module(step)
 
-    rich_logger.info("Data processing completed successfully!")
-    file_logger.info("Data processing completed successfully!")
+    logger.info("Data processing completed successfully!")
 
 def get_model_list(selection):
     """Returns the appropriate list of models based on user selection."""
@@ -68,49 +82,45 @@ def get_model_list(selection):
     elif selection in AVAILABLE_MODELS:
         return [selection]
     else:
-        rich_logger.error(f"Invalid model selection: {selection}")
-        file_logger.error(f"Invalid model selection: {selection}")
+        logger.error("Invalid model selection: %s", selection)
         sys.exit(1)
 
 def train_model(model, base=False):
     """Trains a specific model with or without hyperparameters."""
     if model not in AVAILABLE_MODELS:
-        rich_logger.error(f"Model '{model}' not found. Available models: {AVAILABLE_MODELS}")
-        file_logger.error(f"Model '{model}' not found. Available models: {AVAILABLE_MODELS}")
+        logger.error("Model '%s' not found. Available models: %s", model, AVAILABLE_MODELS)
         sys.exit(1)
     
-    base_flag = "--base" if base else ""
-    run_step(f"python src/ml_processing/train.py --model {model} {base_flag}")
+    command = [sys.executable, os.path.join(PROJECT_ROOT, "src/ml_processing/train.py"), "--model", model]
+    if base:
+        command.append("--base")
+    run_step(command)
 
 def train_models(selection, base=False):
     """Trains all available models with or without hyperparameters."""
     models = get_model_list(selection)
     mode_label = "base models" if base else "parameter-tuned models"
-    rich_logger.info(f"Training {selection} ({mode_label})")
-    file_logger.info(f"Training {selection} ({mode_label})")
+    logger.info("Training %s (%s)", selection, mode_label)
     for model in models:
         train_model(model, base=base)
 
 def tune_model(model):
     """Tunes hyperparameters for a specific model."""
     if model not in AVAILABLE_MODELS:
-        rich_logger.error(f"Model '{model}' not found. Available models: {AVAILABLE_MODELS}")
-        file_logger.error(f"Model '{model}' not found. Available models: {AVAILABLE_MODELS}")
+        logger.error("Model '%s' not found. Available models: %s", model, AVAILABLE_MODELS)
         sys.exit(1)
-    run_step(f"python src/ml_processing/tune.py --model {model}")
+    run_step([sys.executable, os.path.join(PROJECT_ROOT, "src/ml_processing/tune.py"), "--model", model])
 
 def tune_models(selection):
     """Tunes hyperparameters for all available models."""
     models = get_model_list(selection)
-    rich_logger.info(f"Tuning hyperparameters for {selection}")
-    file_logger.info(f"Tuning hyperparameters for {selection}")
+    logger.info("Tuning hyperparameters for %s", selection)
     for model in models:
         tune_model(model)
 
 def run_pipeline():
     """Runs the full pipeline: data processing and model training (parameter-tuned versions)."""
-    rich_logger.info("Running full pipeline (data processing + model training)")
-    file_logger.info("Running full pipeline (data processing + model training)")
+    logger.info("Running full pipeline (data processing + model training)")
     
     run_data_steps()
     train_models("all", base=False)
@@ -127,6 +137,8 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
+    setup_directories()
+
     # Execute based on arguments
     if args.run:
         run_pipeline()
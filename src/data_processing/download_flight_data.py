@@ -2,6 +2,7 @@
 import os
 import sys
 import json
+import hashlib
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
@@ -14,7 +15,7 @@ from utils.config_loader import load_yaml_files # Loads configuration settings f
 
 # ─── Setup Loggers ───────────────────────────────────────────────────────────
 LOG_FILENAME = "flight_download"
-rich_logger, file_logger = setup_loggers(LOG_FILENAME)
+logger, file_logger = setup_loggers(LOG_FILENAME)
 
 # ─── Load Configuration ──────────────────────────────────────────────────────
 CONFIG_FILES = ["config/paths.yaml", "config/data.yaml"]
@@ -24,6 +25,7 @@ config = load_yaml_files(CONFIG_FILES)
 SOURCE_URL = config["flight_data"]["kaggle"]    # List of Kaggle datasets to download
 YEARS = config["overall"]["years"]              # List of years to download
 SAVE_DIR = config["paths"]["raw_flight_data"]   # Directory to save Kaggle datasets
+DOWNLOAD_WORKERS = config["overall"].get("download_workers", 16)  # Max concurrent file downloads
 
 # Ensure save directory exists
 os.makedirs(SAVE_DIR, exist_ok=True)
@@ -35,8 +37,7 @@ KAGGLE_JSON_PATH = os.path.join(CONFIG_DIR, "kaggle.json")
 # Ensure kaggle.json exists before continuing
 if not os.path.exists(KAGGLE_JSON_PATH):
     error_message = f"Please place kaggle.json in {CONFIG_DIR}"
-    rich_logger.error(error_message)
-    file_logger.error(error_message)
+    logger.error(error_message)
     sys.exit(1)
 
 # Load Kaggle credentials manually
@@ -52,38 +53,91 @@ api.authenticate()
 
 # ─── Kaggle API File List Function ────────────────────────────────────────────
 def list_kaggle_files():
-    """Lists all available files in the Kaggle dataset."""
+    """Lists all available files in the Kaggle dataset, mapped to their reported size in bytes."""
     try:
         files = api.dataset_list_files(SOURCE_URL).files
-        return [file.name for file in files]
+        return {file.name: file.totalBytes for file in files}
     except Exception as e:
-        rich_logger.error(f"Error fetching file list from Kaggle: {e}")
-        file_logger.error(f"Error fetching file list from Kaggle: {e}")
+        logger.error("Error fetching file list from Kaggle: %s", e)
         sys.exit(1)
 
+# ─── Local Copy Verification ─────────────────────────────────────────────────
+def find_local_file(file_name):
+    """Returns the local path Kaggle saved `file_name` to (zipped or not), or None if absent."""
+    for candidate in (file_name, f"{file_name}.zip"):
+        path = os.path.join(SAVE_DIR, candidate)
+        if os.path.isfile(path):
+            return path
+    return None
+
+def sha256_file(path):
+    """Computes the SHA-256 hex digest of a file (OpenSSL uses SHA-NI where the CPU has it)."""
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()
+
+def is_up_to_date(file_name, total_bytes):
+    """
+    Checks whether a previous download of `file_name` is still current.
+
+    A sidecar `.sha256` file written after each download records the size Kaggle reported
+    and the digest of the local copy; both must still match for the download to be skipped.
+
+    Args:
+        file_name (str): Name of the file in the Kaggle dataset.
+        total_bytes (int): Size currently reported by Kaggle for the file.
+    """
+    local_path = find_local_file(file_name)
+    if local_path is None or not os.path.isfile(f"{local_path}.sha256"):
+        return False
+
+    with open(f"{local_path}.sha256", "r") as f:
+        sidecar = json.load(f)
+
+    return sidecar.get("totalBytes") == total_bytes and sidecar.get("sha256") == sha256_file(local_path)
+
+def write_sidecar(file_name, total_bytes):
+    """Records the Kaggle-reported size and local SHA-256 digest next to a downloaded file."""
+    local_path = find_local_file(file_name)
+    if local_path is None:
+        return
+
+    with open(f"{local_path}.sha256", "w") as f:
+        json.dump({"totalBytes": total_bytes, "sha256": sha256_file(local_path)}, f)
+
 # ─── Kaggle API Download Function ────────────────────────────────────────────
-def download_kaggle_file(file_name, progress, task_id):
-    """Downloads a specific file from a Kaggle dataset."""
+def download_kaggle_file(file_name, total_bytes, progress, task_id):
+    """
+    Downloads a specific file from a Kaggle dataset, skipping it if the local copy is current.
+
+    Args:
+        file_name (str): Name of the file in the Kaggle dataset.
+        total_bytes (int): Size reported by Kaggle, used to detect upstream changes.
+        progress (Progress): Shared progress bar instance for tracking progress.
+        task_id (int): The task ID for updating the progress bar.
+    """
     try:
-        file_logger.info(f"Downloading {file_name}...")
+        if is_up_to_date(file_name, total_bytes):
+            logger.info("Skipping %s, local copy is up to date", file_name)
+            return
+
+        file_logger.info("Downloading %s...", file_name)
 
         # Download only the selected file
         api.dataset_download_file(SOURCE_URL, file_name, path=SAVE_DIR, force=True)
+        write_sidecar(file_name, total_bytes)
 
-        rich_logger.info(f"Successfully downloaded {file_name}")
-        file_logger.info(f"Successfully downloaded {file_name}")
+        logger.info("Successfully downloaded %s", file_name)
 
     except Exception as e:
-        rich_logger.error(f"Error downloading {file_name}: {e}")
-        file_logger.error(f"Error downloading {file_name}: {e}")
+        logger.error("Error downloading %s: %s", file_name, e)
 
     finally:
         progress.remove_task(task_id)
 
 # ─── Main Execution ──────────────────────────────────────────────────────────
-if __name__ == "__main__":
-    rich_logger.info("Starting Kaggle dataset download process")
-    file_logger.info("Starting Kaggle dataset download process")
+def main():
+    """Downloads the configured years of flight data from Kaggle."""
+    logger.info("Starting Kaggle dataset download process")
 
     # Get available files from Kaggle
     available_files = list_kaggle_files()
@@ -95,28 +149,28 @@ if __name__ == "__main__":
     missing_years = [year for year in YEARS if f"Combined_Flights_{year}.parquet" not in available_files]
 
     if missing_years:
-        rich_logger.error(f"Missing data for years: {missing_years}")
-        file_logger.error(f"Missing data for years: {missing_years}")
+        logger.error("Missing data for years: %s", missing_years)
 
     # Exit if no valid files are available
     if not files_to_download:
-        rich_logger.error("No valid files available for the requested years")
-        file_logger.error("No valid files available for the requested years")
+        logger.error("No valid files available for the requested years")
         sys.exit(1)
 
     with Progress(
         SpinnerColumn(),
         TextColumn("{task.description}"),
     ) as progress:
-        with ThreadPoolExecutor() as executor:
+        with ThreadPoolExecutor(max_workers=min(len(files_to_download), DOWNLOAD_WORKERS)) as executor:
             futures = {}
 
             for file_name in files_to_download:
                 task_id = progress.add_task(f"Downloading {file_name}...", total=None)
-                futures[executor.submit(download_kaggle_file, file_name, progress, task_id)] = file_name
+                futures[executor.submit(download_kaggle_file, file_name, available_files[file_name], progress, task_id)] = file_name
 
             for future in as_completed(futures):
                 future.result()
 
-    rich_logger.info("All selected Kaggle dataset downloads complete")
-    file_logger.info("All selected Kaggle dataset downloads complete")
\ No newline at end of file
+    logger.info("All selected Kaggle dataset downloads complete")
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,10 @@
 # ─── Load Libraries ──────────────────────────────────────────────────────────
 import os
 import sys
+import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from rich.progress import Progress, BarColumn, DownloadColumn, TextColumn, SpinnerColumn
 
@@ -23,19 +26,117 @@ config = load_yaml_files(CONFIG_FILES)
 SOURCE_URL = config["noaa_data"]["base_url"]    # NOAA dataset base URL
 YEARS = config["overall"]["years"]              # List of years to download
 SAVE_DIR = config["paths"]["raw_noaa_data"]     # Directory to save downloaded data
+SEGMENTS = config["noaa_data"].get("download_segments", 1)  # Parallel byte-range requests per file
+DOWNLOAD_WORKERS = config["overall"].get("download_workers", 16)  # Max concurrent file downloads
 
 # Ensure save directory exists
 os.makedirs(SAVE_DIR, exist_ok=True)
 
 # ─── Setup Loggers ───────────────────────────────────────────────────────────
-# Initialize logging for console (rich_logger) and file output (file_logger)
+# Initialize logging for console + file output (logger) and file-only output (file_logger)
 LOG_FILENAME = "noaa_download"
-rich_logger, file_logger = setup_loggers(LOG_FILENAME)
+logger, file_logger = setup_loggers(LOG_FILENAME)
+
+# ─── HTTP Session ────────────────────────────────────────────────────────────
+# One keep-alive connection pool shared by all download threads, with retries on transient errors
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=len(YEARS),
+    pool_maxsize=len(YEARS) * max(SEGMENTS, 1),
+    max_retries=Retry(total=5, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504]),
+))
+REQUEST_TIMEOUT = (5, 60)  # (connect, read) timeouts in seconds
+CHUNK_SIZE = 1 << 20       # Read the response body in 1 MiB chunks
+PROGRESS_INTERVAL = 1 / 30 # Advance each progress bar at most ~30 times per second
+
+# ─── Download Helpers ────────────────────────────────────────────────────────
+class RangeNotSatisfied(requests.RequestException):
+    """Raised when a server that advertised byte ranges answers a range request with the whole file."""
+
+def write_chunks(response, file, progress, task_id):
+    """Writes a streamed response body to an open file, advancing the progress bar in batches."""
+    written = 0
+    last_update = time.monotonic()
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        if chunk:
+            file.write(chunk)
+            written += len(chunk)
+            now = time.monotonic()
+            if now - last_update >= PROGRESS_INTERVAL:
+                progress.update(task_id, advance=written)
+                written = 0
+                last_update = now
+    progress.update(task_id, advance=written)
+
+def preallocate(file, size):
+    """Reserves `size` bytes for an open file, falling back to a sparse truncate where posix_fallocate is unavailable."""
+    if size <= 0:
+        return
+    if hasattr(os, "posix_fallocate"):
+        os.posix_fallocate(file.fileno(), 0, size)
+    else:
+        file.truncate(size)
+
+def probe_file(file_url):
+    """Returns the remote file size, whether the server accepts byte-range requests, and its ETag (or Last-Modified)."""
+    response = SESSION.head(file_url, allow_redirects=True, timeout=REQUEST_TIMEOUT)
+    response.raise_for_status()
+    total_size = int(response.headers.get("content-length", 0))
+    accepts_ranges = response.headers.get("accept-ranges", "").lower() == "bytes"
+    validator = response.headers.get("etag") or response.headers.get("last-modified")
+    return total_size, accepts_ranges, validator
+
+def is_up_to_date(save_path, total_size, validator):
+    """Checks whether a local file matches the remote size and the validator recorded when it was downloaded."""
+    etag_path = f"{save_path}.etag"
+    if not validator or not os.path.isfile(save_path) or not os.path.isfile(etag_path):
+        return False
+    if os.path.getsize(save_path) != total_size:
+        return False
+    with open(etag_path, "r") as f:
+        return f.read().strip() == validator
+
+def download_stream(file_url, save_path, total_size, progress, task_id):
+    """Downloads a file as a single streamed GET request into a preallocated local file."""
+    with SESSION.get(file_url, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        response.raise_for_status()
+        with open(save_path, "wb", buffering=CHUNK_SIZE) as file:
+            preallocate(file, total_size)
+            write_chunks(response, file, progress, task_id)
+            file.truncate()  # Trim the reservation if the body was shorter than advertised
+
+def download_range(file_url, save_path, start, end, progress, task_id):
+    """Downloads bytes [start, end] of a file into the same offsets of a pre-sized local file."""
+    headers = {"Range": f"bytes={start}-{end}"}
+    with SESSION.get(file_url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise RangeNotSatisfied(f"Server ignored range request for bytes {start}-{end}")
+        with open(save_path, "r+b", buffering=CHUNK_SIZE) as file:
+            file.seek(start)
+            write_chunks(response, file, progress, task_id)
+
+def download_segmented(file_url, save_path, total_size, progress, task_id):
+    """Downloads a file as SEGMENTS concurrent byte-range requests written at their own offsets."""
+    with open(save_path, "wb") as file:
+        preallocate(file, total_size)
+
+    segment_size = -(-total_size // SEGMENTS)  # Ceiling division
+    with ThreadPoolExecutor(max_workers=SEGMENTS) as executor:
+        futures = [
+            executor.submit(download_range, file_url, save_path, start, min(start + segment_size, total_size) - 1, progress, task_id)
+            for start in range(0, total_size, segment_size)
+        ]
+        for future in as_completed(futures):
+            future.result()
 
 # ─── Download Function ───────────────────────────────────────────────────────
 def download_file(year, progress, task_id):
     """
     Downloads a GHCN yearly dataset from NOAA and saves it locally.
+
+    Files are fetched as SEGMENTS parallel byte-range requests when the server advertises
+    range support, and as a single stream otherwise, or when the ranges turn out to be ignored.
     
     Args:
         year (int): The year of the dataset to be downloaded.
@@ -48,42 +149,59 @@ def download_file(year, progress, task_id):
 
     try:
         # Log download start
-        file_logger.info(f"Downloading {filename}...")
+        file_logger.info("Downloading %s...", filename)
 
-        # Send request to NOAA server with streaming enabled
-        response = requests.get(file_url, stream=True)
-        response.raise_for_status()  # Raise an error if request fails
-        total_size = int(response.headers.get("content-length", 0))  # Get total file size
+        # Ask the NOAA server for the file size, range support and version
+        total_size, accepts_ranges, validator = probe_file(file_url)
 
-        # Update progress task
-        progress.update(task_id, total=total_size)
+        # Skip files already downloaded from the same remote version
+        if is_up_to_date(save_path, total_size, validator):
+            logger.info("Skipping %s, local copy is up to date", filename)
+            return
 
-        # Download in chunks and update progress bar
-        with open(save_path, "wb") as file:
-            for chunk in response.iter_content(chunk_size=1024):  # Download in 1KB chunks
-                if chunk:
-                    file.write(chunk)
+        # Drop any stale validator so an interrupted download is never treated as current
+        etag_path = f"{save_path}.etag"
+        if os.path.exists(etag_path):
+            os.remove(etag_path)
+
+        # Update progress task
+        progress.update(task_id, total=total_size or None)
+
+        # Split large files into parallel ranges, otherwise stream the whole file
+        if SEGMENTS > 1 and accepts_ranges and total_size >= SEGMENTS * CHUNK_SIZE:
+            try:
+                download_segmented(file_url, save_path, total_size, progress, task_id)
+            except RangeNotSatisfied as e:
+                # Some servers and proxies advertise ranges but answer 200; fetch the file in one go instead
+                logger.warning("Range requests failed for %s (%s), retrying as a single download", filename, e)
+                progress.update(task_id, completed=0)
+                download_stream(file_url, save_path, total_size, progress, task_id)
+        else:
+            download_stream(file_url, save_path, total_size, progress, task_id)
+
+        # Record the remote version for the next run
+        if validator:
+            with open(etag_path, "w") as f:
+                f.write(validator)
 
         # Log successful download
-        rich_logger.info(f"Successfully downloaded {filename}")
-        file_logger.info(f"Successfully downloaded {filename}")
+        logger.info("Successfully downloaded %s", filename)
 
-    except requests.RequestException as e:
+    except (requests.RequestException, OSError) as e:
         # Log failure
-        rich_logger.error(f"Error downloading {year}: {e}")
-        file_logger.error(f"Error downloading {year}: {e}")
+        logger.error("Error downloading %s: %s", year, e)
 
     finally:
         # Remove task from progress display after completion
         progress.remove_task(task_id)
 
 # ─── Main Execution ──────────────────────────────────────────────────────────
-if __name__ == "__main__":
-    rich_logger.info("Starting NOAA data download process")
-    file_logger.info("Starting NOAA data download process")
+def main():
+    """Downloads the configured years of NOAA weather data."""
+    logger.info("Starting NOAA data download process")
 
-    with Progress(SpinnerColumn(), TextColumn("{task.description}")) as progress:
-        with ThreadPoolExecutor() as executor: # Use multiple threads for faster downloads
+    with Progress(SpinnerColumn(), TextColumn("{task.description}"), BarColumn(), DownloadColumn()) as progress:
+        with ThreadPoolExecutor(max_workers=min(len(YEARS), DOWNLOAD_WORKERS)) as executor: # One thread per file, up to the configured cap
             futures = {}
 
             # Submit download tasks and track them with progress bar
@@ -96,5 +214,7 @@ if __name__ == "__main__":
                 future.result()
 
     # Log completion message
-    rich_logger.info("All NOAA data downloads complete")
-    file_logger.info("All NOAA data downloads complete")
\ No newline at end of file
+    logger.info("All NOAA data downloads complete")
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,19 @@
 import os
+import re
 import sys
+import shutil
+import struct
 import zipfile
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn
+
+# Use zlib-ng's SIMD-accelerated inflate and CLMUL-folded CRC32 for ZIP members when it is installed (pip install zlib-ng)
+try:
+    from zlib_ng import zlib_ng
+    zipfile.zlib = zlib_ng
+    zipfile.crc32 = zlib_ng.crc32  # zipfile binds crc32 at import, so it must be swapped separately
+except ImportError:
+    pass
 
 # ─── Load Utilities ──────────────────────────────────────────────────────────
 # Define project root path and ensure utility modules are accessible
@@ -22,95 +33,261 @@ config = load_yaml_files(CONFIG_FILES)
 SOURCE_DIR = config["paths"]["raw_flight_data"]     # Path to the ZIP archive containing flight data
 SAVE_DIR = config["paths"]["extracted_flight_data"] # Directory where extracted Parquet files will be saved
 DELETE_SOURCE = config["flight_data"]["delete_zip"] # Boolean flag for deleting original .zip files after extraction
+COPY_BUFFER_SIZE = 1 << 20                          # Stream decompressed data through a 1 MiB buffer
+YEAR_RE = re.compile(r"(?:19|20)\d{2}")             # Four-digit year embedded in member names
+
+# Members of one archive share its file handle, and ZipFile serializes every header seek and
+# read on that handle with an internal lock; beyond a few workers threads only contend for it
+EXTRACT_WORKERS = 4
 
 # Ensure the extraction directory exists
 os.makedirs(SAVE_DIR, exist_ok=True)
 
 # ─── Setup Loggers ───────────────────────────────────────────────────────────
-# Initialize logging for console (rich_logger) and file output (file_logger)
+# Initialize logging for console + file output (logger) and file-only output (file_logger)
 LOG_FILENAME = "flight_extract"
-rich_logger, file_logger = setup_loggers(LOG_FILENAME)
+logger, file_logger = setup_loggers(LOG_FILENAME)
+
+# ─── Extraction Functions ────────────────────────────────────────────────────
+def parse_year(member):
+    """Returns the year of a member named like Combined_Flights_2020.parquet, or "unknown"."""
+    stem = os.path.splitext(os.path.basename(member))[0]
+    suffix = stem.rsplit("_", 1)[-1]
+    if len(suffix) == 4 and suffix.isdigit():
+        return suffix
+
+    # Fall back to the first year-like number anywhere in the name
+    match = YEAR_RE.search(member)
+    return match.group(0) if match else "unknown"
+
+def target_filename(member):
+    """Returns the name a member is extracted to, e.g. extracted_flight_2020.parquet."""
+    return f"extracted_flight_{parse_year(member)}.parquet"
+
+def list_parquet_members(zip_ref):
+    """Returns the ZipInfo of every Parquet file inside an open ZIP archive."""
+    return [info for info in zip_ref.infolist() if info.filename.endswith(".parquet")]
+
+def advise_sequential(file, offset, length):
+    """Hints the kernel that a byte range will be read sequentially (no-op where posix_fadvise is unavailable)."""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(file.fileno(), offset, length, os.POSIX_FADV_SEQUENTIAL)
+
+def preallocate(file, size):
+    """Reserves `size` bytes for a file up front so it is laid out contiguously (no-op where posix_fallocate is unavailable)."""
+    if size > 0 and hasattr(os, "posix_fallocate"):
+        os.posix_fallocate(file.fileno(), 0, size)
+
+def is_up_to_date(dest_path, size, source_path):
+    """Checks whether an extracted file has the expected size and is newer than the archive it came from."""
+    return (
+        os.path.isfile(dest_path)
+        and os.path.getsize(dest_path) == size
+        and os.path.getmtime(dest_path) >= os.path.getmtime(source_path)
+    )
+
+def stored_member_offset(zip_file, info):
+    """Returns the absolute offset of a member's data, reading the local header's own name/extra lengths."""
+    zip_file.seek(info.header_offset)
+    header = struct.unpack(zipfile.structFileHeader, zip_file.read(zipfile.sizeFileHeader))
+    name_length = header[zipfile._FH_FILENAME_LENGTH]
+    extra_length = header[zipfile._FH_EXTRA_FIELD_LENGTH]
+    return info.header_offset + zipfile.sizeFileHeader + name_length + extra_length
 
-# ─── Extraction Function ─────────────────────────────────────────────────────
-def extract_parquet_files(zip_path, extract_dir, progress, task_id):
+def copy_stored_member(zip_path, info, dest_path):
     """
-    Extracts all Parquet files from a ZIP archive, renames them based on their year,
-    and saves them to the specified directory.
+    Copies an uncompressed (ZIP_STORED) member straight from the archive to disk.
+
+    Uses os.copy_file_range so the bytes never enter user space where the OS supports it,
+    and falls back to a buffered copy of the same byte range otherwise. Like ZipFile.open,
+    the copy is checked against the member's CRC-32; the in-kernel part is checksummed by
+    reading it back from the output, which is still in the page cache.
 
     Args:
         zip_path (str): Path to the ZIP archive.
+        info (ZipInfo): Metadata of the stored member.
+        dest_path (str): Destination file path.
+
+    Raises:
+        zipfile.BadZipFile: If the copied bytes do not match the member's CRC-32.
+    """
+    with open(zip_path, 'rb') as src, open(dest_path, 'w+b') as dest:
+        preallocate(dest, info.file_size)
+        offset = stored_member_offset(src, info)
+        remaining = info.compress_size
+        advise_sequential(src, offset, remaining)
+        crc = 0
+
+        if hasattr(os, "copy_file_range"):
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dest.fileno(), remaining, offset_src=offset)
+                    if copied == 0:
+                        break
+                    offset += copied
+                    remaining -= copied
+            except OSError:
+                pass  # Unsupported filesystem or kernel, finish with a buffered copy
+
+            # Checksum whatever the kernel copied
+            position, copied_size = 0, info.compress_size - remaining
+            while position < copied_size:
+                chunk = os.pread(dest.fileno(), min(COPY_BUFFER_SIZE, copied_size - position), position)
+                if not chunk:
+                    break
+                crc = zipfile.crc32(chunk, crc)
+                position += len(chunk)
+
+        src.seek(offset)
+        while remaining > 0:
+            chunk = src.read(min(COPY_BUFFER_SIZE, remaining))
+            if not chunk:
+                raise EOFError(f"Unexpected end of archive while copying {info.filename}")
+            dest.write(chunk)
+            crc = zipfile.crc32(chunk, crc)
+            remaining -= len(chunk)
+
+    if crc != info.CRC:
+        raise zipfile.BadZipFile(f"Bad CRC-32 for file {info.filename!r}")
+
+def extract_parquet_member(zip_ref, info, extract_dir, progress, task_id):
+    """
+    Extracts a single Parquet file from a ZIP archive, renames it based on its year,
+    and saves it to the specified directory.
+
+    Workers share one open ZipFile per archive; zipfile serializes only the short
+    header seeks, so members of the same archive still inflate concurrently.
+
+    Args:
+        zip_ref (ZipFile): Open ZIP archive, shared across workers.
+        info (ZipInfo): Metadata of the Parquet member to extract.
         extract_dir (str): Directory to save extracted files.
-        delete_source (bool): Whether to delete the ZIP file after extraction.
         progress (Progress): Progress bar instance.
-        task_id (int): Task ID for tracking progress.
+        task_id (int): The aggregate task ID, advanced once this member is done.
+
+    Returns:
+        bool: True if the member was extracted successfully.
     """
+    zip_filename = os.path.basename(zip_ref.filename)
+    member = info.filename
+    tmp_path = None
+
     try:
-        zip_filename = os.path.basename(zip_path)
-        file_logger.info(f"Extracting {zip_filename}...")
+        file_logger.info("Extracting %s from %s...", member, zip_filename)
 
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            parquet_files = [f for f in zip_ref.namelist() if f.endswith(".parquet")]
+        # Construct new file name from the year in the member name, and the destination path
+        new_filename = target_filename(member)
+        new_path = os.path.join(extract_dir, new_filename)
 
-            if not parquet_files:
-                rich_logger.warning(f"No raw Flight .zip files found in the source directory")
-                file_logger.warning(f"No raw Flight .zip files found in the source directory")
-                return
+        # Skip members already extracted from this version of the archive
+        if is_up_to_date(new_path, info.file_size, zip_ref.filename):
+            logger.info("Skipping %s, %s is up to date", member, new_filename)
+            return True
 
-            for file in parquet_files:
-                # Determine which year is present in the file name
-                matched_years = [str(y) for y in range(2000, 2030) if str(y) in file]
-                year_str = matched_years[0] if matched_years else "unknown"
+        # Write under a temporary name so an interrupted run never leaves a truncated file in place
+        tmp_path = f"{new_path}.tmp"
 
-                # Construct new file name and destination path
-                new_filename = f"extracted_flight_{year_str}.parquet"
-                new_path = os.path.join(extract_dir, new_filename)
+        # Unencrypted stored members are raw bytes in the archive and can be copied in-kernel
+        if info.compress_type == zipfile.ZIP_STORED and not info.flag_bits & 0x1:
+            copy_stored_member(zip_ref.filename, info, tmp_path)
+        else:
+            # Extract and save the file, streaming instead of holding it all in memory
+            advise_sequential(zip_ref.fp, info.header_offset, info.compress_size)
+            with zip_ref.open(info) as src, open(tmp_path, 'wb', buffering=COPY_BUFFER_SIZE) as dest:
+                preallocate(dest, info.file_size)
+                shutil.copyfileobj(src, dest, length=COPY_BUFFER_SIZE)
 
-                # Extract and save the file
-                with zip_ref.open(file) as src, open(new_path, 'wb') as dest:
-                    dest.write(src.read())
+        # Move the finished file into place with a single rename(2)
+        os.replace(tmp_path, new_path)
 
         # Log successful extraction
-        rich_logger.info(f"Successfully extracted {file} as {new_filename}")
-        file_logger.info(f"Successfully extracted {file} as {new_filename}")
-
-        # Delete ZIP file after successful extraction if enabled
-        if DELETE_SOURCE:
-            os.remove(zip_path)
-            rich_logger.info(f"Deleted raw Flight zip file: {zip_filename}")
-            file_logger.info(f"Deleted raw Flight zip file: {zip_filename}")
+        logger.info("Successfully extracted %s as %s", member, new_filename)
+        return True
 
     except Exception as e:
-        # Log extraction failure
-        rich_logger.error(f"Error extracting {file}: {e}")
-        file_logger.error(f"Error extracting {file}: {e}")
+        # Log extraction failure and drop the partial output so it is never taken as up to date
+        logger.error("Error extracting %s from %s: %s", member, zip_filename, e)
+        if tmp_path is not None and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False
+
     finally:
-        # Remove task from progress display after completion
-        progress.remove_task(task_id)
+        # Count this member as done in the aggregate progress task
+        progress.advance(task_id)
 
 # ─── Main Execution ──────────────────────────────────────────────────────────
-if __name__ == "__main__":
-    rich_logger.info("Starting flight data extraction process")
-    file_logger.info("Starting flight data extraction process")
+def main():
+    """Extracts all Parquet files from the raw flight ZIP archives, one member per worker."""
+    logger.info("Starting flight data extraction process")
 
     # Find all ZIP files in the source directory
-    zip_files = [os.path.join(SOURCE_DIR, f) for f in os.listdir(SOURCE_DIR) if f.endswith(".zip")]
+    with os.scandir(SOURCE_DIR) as entries:
+        zip_files = [e.path for e in entries if e.is_file() and e.name.endswith(".zip")]
 
     if not zip_files:
-        rich_logger.warning("No ZIP files found in the source directory")
-        file_logger.warning("No ZIP files found in the source directory")
+        logger.warning("No ZIP files found in the source directory")
     else:
-        with Progress(SpinnerColumn(), TextColumn("{task.description}")) as progress:
-            with ThreadPoolExecutor() as executor:
-                futures = {}
+        # Track outstanding members per archive so each ZIP is only deleted once fully extracted
+        zip_refs = {}
+        remaining = {}
+        failed = set()
 
+        try:
+            with Progress(SpinnerColumn(), TextColumn("{task.description}"), BarColumn(), MofNCompleteColumn()) as progress:
+                # Single aggregate progress task; its total is known once every archive is listed
+                task_id = progress.add_task("Extracting flight files...", total=None)
+
+                # Members that map to the same output name would write it concurrently; like the
+                # sequential overwrite they replace, the last one listed wins and the others are skipped
+                targets = {}
                 for zip_file in zip_files:
                     zip_filename = os.path.basename(zip_file)
-                    task_id = progress.add_task(f"Extracting from {zip_filename}...")
-                    futures[executor.submit(extract_parquet_files, zip_file, SAVE_DIR, progress, task_id)] = zip_file
 
-                for future in as_completed(futures):
-                    future.result()
+                    # Open each archive once; its central directory is parsed a single time
+                    zip_ref = zipfile.ZipFile(zip_file, 'r')
+                    zip_refs[zip_file] = zip_ref
+                    members = list_parquet_members(zip_ref)
+
+                    if not members:
+                        logger.warning("No Parquet files found in %s", zip_filename)
+                        continue
+
+                    for info in members:
+                        new_filename = target_filename(info.filename)
+                        if new_filename in targets:
+                            skipped_file, _, skipped_info = targets[new_filename]
+                            logger.warning("Skipping %s from %s, %s from %s is also extracted as %s",
+                                           skipped_info.filename, os.path.basename(skipped_file), info.filename, zip_filename, new_filename)
+                            failed.add(skipped_file)  # Keep the archive, one of its members was not extracted
+                        targets[new_filename] = (zip_file, zip_ref, info)
+
+                with ThreadPoolExecutor(max_workers=EXTRACT_WORKERS) as executor:
+                    futures = {}
+
+                    for zip_file, zip_ref, info in targets.values():
+                        remaining[zip_file] = remaining.get(zip_file, 0) + 1
+                        futures[executor.submit(extract_parquet_member, zip_ref, info, SAVE_DIR, progress, task_id)] = zip_file
+
+                    progress.update(task_id, total=len(futures))
+
+                    for future in as_completed(futures):
+                        zip_file = futures[future]
+                        if not future.result():
+                            failed.add(zip_file)
+
+                        remaining[zip_file] -= 1
+
+                        # Delete ZIP file after all of its members were extracted if enabled
+                        if remaining[zip_file] == 0 and zip_file not in failed and DELETE_SOURCE:
+                            zip_refs.pop(zip_file).close()
+                            os.remove(zip_file)
+                            logger.info("Deleted raw Flight zip file: %s", os.path.basename(zip_file))
+        finally:
+            for zip_ref in zip_refs.values():
+                zip_ref.close()
 
     # Log completion message
-    rich_logger.info("All flight data extractions complete")
-    file_logger.info("All flight data extractions complete")
\ No newline at end of file
+    logger.info("All flight data extractions complete")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,22 @@
 # ─── Load Libraries ──────────────────────────────────────────────────────────
 import os
 import sys
-import gzip
+import zlib
 import shutil
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from rich.progress import Progress, SpinnerColumn, TextColumn
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn
+
+# Decode each gzip stream across all cores with rapidgzip when it is installed (pip install rapidgzip)
+try:
+    import rapidgzip
+except ImportError:
+    rapidgzip = None
+
+# Otherwise use ISA-L's SIMD inflate with threaded read-ahead when it is installed (pip install isal)
+try:
+    from isal import igzip_threaded
+except ImportError:
+    igzip_threaded = None
 
 # ─── Load Utilities ──────────────────────────────────────────────────────────
 # Define project root path and ensure utility modules are accessible
@@ -25,15 +37,68 @@ SOURCE_DIR = config["paths"]["raw_noaa_data"]       # Directory containing .gz f
 SAVE_DIR = config["paths"]["extracted_noaa_data"]   # Directory for extracted CSV files
 DELETE_SOURCE = config["noaa_data"]["delete_gz"]    # Boolean flag for deleting original .gz files after extraction
 
+COPY_BUFFER_SIZE = 8 << 20                          # Copy decompressed data in 8 MiB chunks
+ISAL_THREADS = 3                                    # Threads igzip_threaded uses per file
+
+# Files extracted concurrently: rapidgzip already uses every core per file, igzip_threaded uses ISAL_THREADS,
+# and zlib releases the GIL while inflating so one thread per core keeps every core busy
+if rapidgzip is not None:
+    EXTRACT_WORKERS = 1
+elif igzip_threaded is not None:
+    EXTRACT_WORKERS = max(1, (os.cpu_count() or 1) // ISAL_THREADS)
+else:
+    EXTRACT_WORKERS = os.cpu_count() or 1
+
 # Ensure the extraction directory exists
 os.makedirs(SAVE_DIR, exist_ok=True)
 
 # ─── Setup Loggers ───────────────────────────────────────────────────────────
-# Initialize logging for console (rich_logger) and file output (file_logger)
+# Initialize logging for console + file output (logger) and file-only output (file_logger)
 LOG_FILENAME = "noaa_extract"
-rich_logger, file_logger = setup_loggers(LOG_FILENAME)
+logger, file_logger = setup_loggers(LOG_FILENAME)
 
 # ─── Extraction Function ─────────────────────────────────────────────────────
+def inflate_gzip(gz_path, f_out):
+    """
+    Decompresses a (possibly multi-member) gzip file into an open file in large blocks.
+
+    zlib releases the GIL while inflating, so feeding it large blocks directly (instead of
+    gzip.GzipFile's small reads and Python-level framing) lets files handled by different
+    threads decompress on separate cores.
+
+    Args:
+        gz_path (str): Path to the .gz file.
+        f_out (file): Binary file object the decompressed data is written to.
+    """
+    with open(gz_path, "rb") as f_in:
+        decompressor = zlib.decompressobj(wbits=31)  # 31 = expect a gzip header and trailer
+        fed = False
+
+        while True:
+            block = f_in.read(COPY_BUFFER_SIZE)
+            if not block:
+                break
+
+            while block:
+                # Zero padding between members can span blocks, so skip it until a member starts
+                if not fed:
+                    block = block.lstrip(b"\x00")
+                    if not block:
+                        break
+
+                fed = True
+                f_out.write(decompressor.decompress(block))
+                if not decompressor.eof:
+                    break
+
+                # Start the next gzip member with whatever followed the last one
+                block = decompressor.unused_data
+                decompressor = zlib.decompressobj(wbits=31)
+                fed = False
+
+        if fed and not decompressor.eof:
+            raise EOFError(f"Compressed file ended before the end-of-stream marker was reached: {gz_path}")
+
 def extract_file(gz_path, progress, task_id):
     """
     Extracts a GHCN dataset from .gz format and optionally deletes the original file.
@@ -41,61 +106,77 @@ def extract_file(gz_path, progress, task_id):
     Args:
         gz_path (str): Path to the .gz file that needs to be extracted.
         progress (Progress): Shared progress instance for tracking extraction status.
-        task_id (int): The task ID for updating the spinner status.
+        task_id (int): The aggregate task ID, advanced once this file is done.
     """
     gz_filename = os.path.basename(gz_path)  # Get the filename from the path
     csv_filename = f"extracted_noaa_{gz_filename.replace('.csv.gz', '.csv')}"  # Construct output filename
     csv_path = os.path.join(SAVE_DIR, csv_filename)  # Define the extraction path
+    tmp_path = f"{csv_path}.tmp"  # Written first, then renamed so partial output never sits at csv_path
 
     try:
+        # Skip files already extracted from this version of the archive
+        if os.path.isfile(csv_path) and os.path.getsize(csv_path) > 0 and os.path.getmtime(csv_path) >= os.path.getmtime(gz_path):
+            logger.info("Skipping %s, %s is up to date", gz_filename, csv_filename)
+            return
+
         # Log extraction start
-        file_logger.info(f"Extracting {gz_filename}...")
+        file_logger.info("Extracting %s...", gz_filename)
 
         # Extract .gz file to .csv format
-        with gzip.open(gz_path, "rb") as f_in, open(csv_path, "wb") as f_out:
-            shutil.copyfileobj(f_in, f_out)  # Copy file contents from compressed to uncompressed format
+        with open(tmp_path, "wb") as f_out:
+            if rapidgzip is not None:
+                with rapidgzip.open(gz_path, parallelization=os.cpu_count()) as f_in:
+                    shutil.copyfileobj(f_in, f_out, length=COPY_BUFFER_SIZE)  # Copy file contents from compressed to uncompressed format
+            elif igzip_threaded is not None:
+                with igzip_threaded.open(gz_path, "rb", threads=ISAL_THREADS, block_size=1 << 20) as f_in:
+                    shutil.copyfileobj(f_in, f_out, length=COPY_BUFFER_SIZE)
+            else:
+                inflate_gzip(gz_path, f_out)
+
+        # Move the finished file into place with a single rename(2)
+        os.replace(tmp_path, csv_path)
 
         # Delete the original .gz file if configured to do so
         if DELETE_SOURCE:
             os.remove(gz_path)
-            rich_logger.info(f"Deleted raw NOAA gz file: {gz_filename}")
-            file_logger.info(f"Deleted raw NOAA gz file: {gz_filename}")
+            logger.info("Deleted raw NOAA gz file: %s", gz_filename)
 
         # Log successful extraction
-        rich_logger.info(f"Successfully extracted {gz_filename}")
-        file_logger.info(f"Successfully extracted {gz_filename}")
+        logger.info("Successfully extracted %s", gz_filename)
 
     except Exception as e:
-        # Log extraction failure
-        rich_logger.error(f"Error extracting {gz_filename}: {e}")
-        file_logger.error(f"Error extracting {gz_filename}: {e}")
+        # Log extraction failure and drop the partial output so it is never taken as up to date
+        logger.error("Error extracting %s: %s", gz_filename, e)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
 
     finally:
-        # Remove task from progress display after completion
-        progress.remove_task(task_id)
+        # Count this file as done in the aggregate progress task
+        progress.advance(task_id)
 
 # ─── Main Execution ──────────────────────────────────────────────────────────
-if __name__ == "__main__":
-    rich_logger.info("Starting NOAA data extraction process")
-    file_logger.info("Starting NOAA data extraction process")
+def main():
+    """Extracts all raw NOAA .gz files in the source directory."""
+    logger.info("Starting NOAA data extraction process")
 
     # Get a list of all .gz files in the source directory
-    gz_files = [os.path.join(SOURCE_DIR, f) for f in os.listdir(SOURCE_DIR) if f.endswith(".csv.gz")]
+    with os.scandir(SOURCE_DIR) as entries:
+        gz_files = [e.path for e in entries if e.is_file() and e.name.endswith(".csv.gz")]
 
     if not gz_files:
         # Log warning if no files are found
-        rich_logger.warning("No raw NOAA .gz files found in the source directory")
-        file_logger.warning("No raw NOAA .gz files found in the source directory")
+        logger.warning("No raw NOAA .gz files found in the source directory")
     else:
-        # Initialize a progress task with a spinner indicator
-        with Progress(SpinnerColumn(), TextColumn("{task.description}")) as progress:
-            with ThreadPoolExecutor() as executor: # Use multiple threads for parallel extraction
+        # Initialize a single aggregate progress task for all files
+        with Progress(SpinnerColumn(), TextColumn("{task.description}"), BarColumn(), MofNCompleteColumn()) as progress:
+            task_id = progress.add_task("Extracting NOAA files...", total=len(gz_files))
+
+            with ThreadPoolExecutor(max_workers=min(len(gz_files), EXTRACT_WORKERS)) as executor:
                 futures = {}
 
-                # Create progress spinner tasks and submit extraction jobs
+                # Submit extraction jobs
                 for gz_file in gz_files:
                     gz_filename = os.path.basename(gz_file)
-                    task_id = progress.add_task(f"Extracting {gz_filename}...")  # Add a task for tracking
                     futures[executor.submit(extract_file, gz_file, progress, task_id)] = gz_filename
 
                 # Wait for all tasks to complete
@@ -103,5 +184,7 @@ if __name__ == "__main__":
                     future.result()
 
     # Log completion message
-    rich_logger.info("All NOAA data extractions complete")
-    file_logger.info("All NOAA data extractions complete")
\ No newline at end of file
+    logger.info("All NOAA data extractions complete")
+
+if __name__ == "__main__":
+    main()
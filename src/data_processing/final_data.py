@@ -1,11 +1,11 @@
 import os
 import sys
 import duckdb
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import TargetEncoder, StandardScaler
-from rich.progress import Progress, SpinnerColumn, TextColumn
+import pyarrow.dataset as ds
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from rich.progress import Progress, SpinnerColumn, TextColumn
 
 # ─── Load Utilities ──────────────────────────────────────────────────────────
 # Define project root path and ensure utility modules are accessible
@@ -25,51 +25,150 @@ WEATHER_DIR = config["paths"]["processed_noaa_data"]            # Processed NOAA
 SAVE_DIR = config["paths"]["final_by_year"]                     # Final save directory
 YEARS = config["overall"]["years"]                              # Years to process
 DELETE_SOURCE_FILES = config["final_data"]["delete_processed"]  # Optional deletion of source data to save space
+DUCKDB_MEMORY_LIMIT = config["final_data"].get("duckdb_memory_limit")  # Optional DuckDB memory cap (e.g. "8GB")
+
+MERGED_DIR = os.path.join(SAVE_DIR, "merged_flight_weather")  # Merged flight + weather data, hive-partitioned by Year
+
+WEATHER_VARS = ["TMIN", "TMAX", "PRCP", "SNOW", "SNWD"]  # Weather elements averaged per airport
+DELAY_VARS = ["DepDelayMinutes"]                         # Delay columns averaged per Origin
+ROLLING_WINDOWS = {"weekly": 7, "monthly": 30}           # Rolling window lengths, in days with flights
+CATEGORICAL_COLS = ["Airline", "Origin", "Dest", "AirTimeCategory", "DistanceCategory"]  # Target-encoded features
+TARGET_ENCODER_FOLDS = 5                                 # Cross-fitting folds for encoding the training rows
+SORT_KEYS = ['Origin', 'FlightDate', 'CRSDepTime', 'Airline', 'Dest', 'CRSArrTime']  # Chronological order per Origin
+TIE_BREAK_COLS = ['AirTime', 'Distance', 'DepDelayMinutes', 'DepDel15']        # Remaining per-flight columns
 
 # Ensure output directory exists
 os.makedirs(SAVE_DIR, exist_ok=True)
 
 # ─── Setup Loggers ───────────────────────────────────────────────────────────
 LOG_FILENAME = "flight_weather_merge"
-rich_logger, file_logger = setup_loggers(LOG_FILENAME)
+logger, file_logger = setup_loggers(LOG_FILENAME)
 
 # ─── Helper Functions ────────────────────────────────────────────────────────
-def merge_flight_weather(year, progress, task_id):
+def rolling_daily_ctes(key, columns):
     """
-    Merges flight data with corresponding weather data for a given year.
-    
+    Builds the SQL CTEs computing per-airport rolling means of daily averages.
+
+    Each column is averaged per `key` and FlightDate, forward- then back-filled within
+    the airport, and averaged over the preceding N days with flights. The current day
+    is excluded and windows never reach into another airport's rows.
+
     Args:
-        year (int): Year to process.
-        progress (Progress): Shared progress instance.
-        task_id (int): The task ID for updating the spinner status.
+        key (str): Airport column to partition by ('Origin' or 'Dest').
+        columns (list): (source column, output suffix) pairs; outputs are named
+            '{period}_avg_{key}_{suffix}', e.g. 'weekly_avg_origin_tmin'.
+
+    Returns:
+        str: CTE definitions ending in 'origin_rolling' or 'dest_rolling', keyed by (`key`, FlightDate).
     """
-    flight_file = os.path.join(FLIGHT_DIR, f"processed_flight_{year}.parquet")
-    weather_file = os.path.join(WEATHER_DIR, f"processed_noaa_{year}.parquet")
-
-    if not os.path.exists(flight_file):
-        rich_logger.warning(f"Skipping {year}: Missing flight file.")
-        file_logger.warning(f"Skipping {year}: Missing flight file.")
-        progress.remove_task(task_id)
-        return None
-    
-    if not os.path.exists(weather_file):
-        rich_logger.warning(f"Skipping {year}: Missing weather file.")
-        file_logger.warning(f"Skipping {year}: Missing weather file.")
-        progress.remove_task(task_id)
-        return None
+    alias = key.lower()
+    daily = ", ".join(f"AVG({col}) AS {col}" for col, _ in columns)
+    filled = ", ".join(
+        f"COALESCE(LAST_VALUE({col} IGNORE NULLS) OVER past, FIRST_VALUE({col} IGNORE NULLS) OVER future) AS {col}"
+        for col, _ in columns
+    )
+    rolling = ", ".join(
+        f"AVG({col}) OVER (PARTITION BY {key} ORDER BY FlightDate "
+        f"ROWS BETWEEN {window} PRECEDING AND 1 PRECEDING) AS {period}_avg_{alias}_{suffix}"
+        for period, window in ROLLING_WINDOWS.items()
+        for col, suffix in columns
+    )
+    return f"""
+            {alias}_daily AS (
+                SELECT {key}, FlightDate, {daily} FROM merged GROUP BY {key}, FlightDate
+            ),
+            {alias}_filled AS (
+                SELECT {key}, FlightDate, {filled}
+                FROM {alias}_daily
+                WINDOW past AS (PARTITION BY {key} ORDER BY FlightDate ROWS BETWEEN UNBOUNDED PRECEDING AND CURRENT ROW),
+                       future AS (PARTITION BY {key} ORDER BY FlightDate ROWS BETWEEN CURRENT ROW AND UNBOUNDED FOLLOWING)
+            ),
+            {alias}_rolling AS (
+                SELECT {key}, FlightDate, {rolling} FROM {alias}_filled
+            )"""
+
+def connect_duckdb():
+    """Opens the DuckDB connection shared by every step of the run."""
+    con = duckdb.connect(database=":memory:")
+    con.execute(f"PRAGMA threads={os.cpu_count()}")
+    if DUCKDB_MEMORY_LIMIT:
+        con.execute(f"PRAGMA memory_limit='{DUCKDB_MEMORY_LIMIT}'")
+    # Let the join and COPY emit rows as threads finish instead of buffering them back into input order
+    con.execute("SET preserve_insertion_order = false")
+    return con
+
+def merge_flight_weather(con, years, merged_dir):
+    """
+    Merges flight data with corresponding weather data for all years in a single DuckDB query.
 
-    try:
-        # Log merging start
-        file_logger.info(f"Merging {year}...")
+    Flight and weather files of every year are exposed as views over `read_parquet`, so
+    DuckDB pushes the projection into the Parquet reader and the join is written straight
+    to a `Year=YYYY/` partitioned Parquet directory without materializing any intermediate
+    table. Readers can prune to the years they need instead of scanning one monolithic file.
+
+    The weekly and monthly rolling averages of weather (per Origin and Dest) and of
+    departure delay (per Origin) are computed in the same query with window functions.
+
+    Args:
+        con (DuckDBPyConnection): Shared DuckDB connection.
+        years (list): Years to process; years missing either input file are skipped.
+        merged_dir (str): Directory of the partitioned Parquet dataset to write (replaced on each run).
+
+    Returns:
+        list: Years that were merged (empty if none were available or the merge failed).
+    """
+    flight_files, weather_files, merged_years = [], [], []
 
-        # Setup duckdb
-        con = duckdb.connect(database=":memory:")
+    for year in years:
+        flight_file = os.path.join(FLIGHT_DIR, f"processed_flight_{year}.parquet")
+        weather_file = os.path.join(WEATHER_DIR, f"processed_noaa_{year}.parquet")
 
-        con.execute(f"CREATE TABLE flights AS SELECT * FROM read_parquet('{flight_file}')")
-        con.execute(f"CREATE TABLE weather AS SELECT * FROM read_parquet('{weather_file}')")
+        if not os.path.exists(flight_file):
+            logger.warning("Skipping %s: Missing flight file.", year)
+            continue
 
-        # Perform LEFT JOINs for Origin and Destination weather
-        merged_df = con.execute("""
+        if not os.path.exists(weather_file):
+            logger.warning("Skipping %s: Missing weather file.", year)
+            continue
+
+        flight_files.append(flight_file)
+        weather_files.append(weather_file)
+        merged_years.append(year)
+
+    if not merged_years:
+        return []
+
+    try:
+        # Log merging start
+        file_logger.info("Merging %s...", merged_years)
+
+        flight_list = ", ".join(f"'{f}'" for f in flight_files)
+        weather_list = ", ".join(f"'{f}'" for f in weather_files)
+
+        # Years are matched by column name so a file written with a different column order still lines up
+        con.execute(f"CREATE OR REPLACE VIEW flights AS SELECT * FROM read_parquet([{flight_list}], union_by_name=true)")
+        # Only the join key and the five weather elements go into the hash tables. GHCN values
+        # are integers in tenths of a unit, so 4-byte REAL holds them exactly at half the width
+        weather_cols = ", ".join(f"CAST({var} AS REAL) AS {var}" for var in WEATHER_VARS)
+        con.execute(f"""
+            CREATE OR REPLACE VIEW weather AS
+            SELECT STATION, CAST(DATE AS DATE) AS DATE, {weather_cols}
+            FROM read_parquet([{weather_list}], union_by_name=true)
+        """)
+
+        # Rolling averages of daily means, added after the merged flight columns
+        origin_columns = [(f"Origin_{var}", var.lower()) for var in WEATHER_VARS] + [(col, col.lower()) for col in DELAY_VARS]
+        dest_columns = [(f"Dest_{var}", var.lower()) for var in WEATHER_VARS]
+        rolling_cols = (
+            [f"o.{period}_avg_origin_{var.lower()}" for period in ROLLING_WINDOWS for var in WEATHER_VARS]
+            + [f"d.{period}_avg_dest_{var.lower()}" for period in ROLLING_WINDOWS for var in WEATHER_VARS]
+            + [f"o.{period}_avg_origin_{col.lower()}" for period in ROLLING_WINDOWS for col in DELAY_VARS]
+        )
+
+        # Perform LEFT JOINs for Origin and Destination weather, add rolling averages and write the result to Parquet
+        con.execute(f"""
+            COPY (
+            WITH merged AS (
             SELECT 
                 f.*, 
                 w_origin.PRCP AS Origin_PRCP, 
@@ -85,175 +184,143 @@ def merge_flight_weather(year, progress, task_id):
             FROM flights f
             LEFT JOIN weather w_origin 
                 ON f.Origin = w_origin.STATION 
-                AND f.FlightDate = w_origin.DATE
+                AND CAST(f.FlightDate AS DATE) = w_origin.DATE
             LEFT JOIN weather w_dest
                 ON f.Dest = w_dest.STATION 
-                AND f.FlightDate = w_dest.DATE
+                AND CAST(f.FlightDate AS DATE) = w_dest.DATE
             WHERE w_origin.STATION IS NOT NULL  
                 OR w_dest.STATION IS NOT NULL
-        """).fetchdf()
-
-        con.close()
+            ),
+            {rolling_daily_ctes("Origin", origin_columns)},
+            {rolling_daily_ctes("Dest", dest_columns)}
+            SELECT m.*, {", ".join(rolling_cols)}, YEAR(CAST(m.FlightDate AS DATE)) AS Year
+            FROM merged m
+            LEFT JOIN origin_rolling o ON m.Origin = o.Origin AND m.FlightDate = o.FlightDate
+            LEFT JOIN dest_rolling d ON m.Dest = d.Dest AND m.FlightDate = d.FlightDate
+            ) TO '{merged_dir}' (FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE 1000000, PARTITION_BY (Year), OVERWRITE)
+        """)
 
         if DELETE_SOURCE_FILES:
-            os.remove(flight_file)
-            os.remove(weather_file)
-            rich_logger.info(f"Deleted processed files for {year}")
-            file_logger.info(f"Deleted processed files for {year}")
+            for source_file in flight_files + weather_files:
+                os.remove(source_file)
+            logger.info("Deleted processed files for %s", merged_years)
 
         # Log successful merging
-        rich_logger.info(f"Successfully merged {year}")
-        file_logger.info(f"Successfully merged {year}")
+        logger.info("Successfully merged %s", merged_years)
 
-        return merged_df
+        return merged_years
 
     except Exception as e:
         # Log merging failure
-        rich_logger.error(f"Error merged {year}: {e}")
-        file_logger.error(f"Error merged {year}: {e}")
-
-    finally:
-        # Remove task from progress display after completion
-        progress.remove_task(task_id)
-
-def add_rolling_averages_weather(df):
-    """Compute rolling averages for weather-related variables efficiently for both Origin and Destination."""
-
-    variables = ['TMIN', 'TMAX', 'PRCP', 'SNOW', 'SNWD']
-    time_windows = {'weekly': 7, 'monthly': 30}
-
-    # Step 1: Aggregate daily weather values per Origin & Destination
-    origin_vars = [f'Origin_{var}' for var in variables]
-    dest_vars = [f'Dest_{var}' for var in variables]
-
-    origin_daily_avg = df.groupby(['Origin', 'FlightDate'])[origin_vars].mean().reset_index()
-    dest_daily_avg = df.groupby(['Dest', 'FlightDate'])[dest_vars].mean().reset_index()
-
-    # Step 2: Compute rolling averages separately for Origin & Destination
-    origin_rolling_avg_cols = []  # List to store new rolling avg column names
-    dest_rolling_avg_cols = []
-
-    for period, window in time_windows.items():
-        for var in variables:
-            # Rolling average for Origin-specific weather
-            origin_col = f'Origin_{var}'
-            origin_avg_col = f'{period}_avg_origin_{var.lower()}'
-            origin_daily_avg[origin_avg_col] = (
-                origin_daily_avg.groupby('Origin')[origin_col]
-                .apply(lambda x: x.ffill().bfill())
-                .rolling(window=window, min_periods=1)
-                .mean()
-                .shift(1)  # Exclude the current day
-                .reset_index(level=0, drop=True)
-            )
-            origin_rolling_avg_cols.append(origin_avg_col)
-
-            # Rolling average for Destination-specific weather
-            dest_col = f'Dest_{var}'
-            dest_avg_col = f'{period}_avg_dest_{var.lower()}'
-            dest_daily_avg[dest_avg_col] = (
-                dest_daily_avg.groupby('Dest')[dest_col]
-                .apply(lambda x: x.ffill().bfill())
-                .rolling(window=window, min_periods=1)
-                .mean()
-                .shift(1)  # Exclude the current day
-                .reset_index(level=0, drop=True)
-            )
-            dest_rolling_avg_cols.append(dest_avg_col)
-
-    # Step 3: Merge rolling averages back to the full dataset using DuckDB
-    conn = duckdb.connect()
-    conn.register("df", df)
-    conn.register("origin_avg", origin_daily_avg)
-    conn.register("dest_avg", dest_daily_avg)
-
-    # Select only rolling average columns (ignoring duplicate originals)
-    origin_rolling_avgs = ", ".join([f"origin_avg.{col}" for col in origin_rolling_avg_cols])
-    dest_rolling_avgs = ", ".join([f"dest_avg.{col}" for col in dest_rolling_avg_cols])
-
-    df_merged = conn.execute(f"""
-        SELECT df.*, 
-               {origin_rolling_avgs},
-               {dest_rolling_avgs}
-        FROM df
-        LEFT JOIN origin_avg 
-        ON df.Origin = origin_avg.Origin AND df.FlightDate = origin_avg.FlightDate
-        LEFT JOIN dest_avg 
-        ON df.Dest = dest_avg.Dest AND df.FlightDate = dest_avg.FlightDate
-    """).fetchdf()
-
-    conn.close()
-    
-    return df_merged
-
-def add_rolling_averages_delays(df, columns=['DepDelayMinutes'], windows={'weekly': 7, 'monthly': 30}):
-    """Compute rolling averages in Pandas and use DuckDB for faster merging."""
-
-    # Step 1: Aggregate to daily means per Origin
-    daily_avg = df.groupby(['Origin', 'FlightDate'])[columns].mean().reset_index()
-
-    # Step 2: Compute rolling averages on the smaller dataset
-    rolling_avg_cols = []
-    for period, window in windows.items():
-        for col in columns:
-            avg_col_name = f"{period}_avg_origin_{col.lower()}"
-            daily_avg[avg_col_name] = (
-                daily_avg.groupby('Origin')[col]
-                .apply(lambda x: x.ffill().bfill())
-                .rolling(window=window, min_periods=1)
-                .mean()
-                .shift(1)  # Excludes the current day from the rolling average
-                .reset_index(level=0, drop=True)
-            )
-            rolling_avg_cols.append(avg_col_name)
-
-    # Step 3: Merge rolling averages back to the full dataset using DuckDB
-    conn = duckdb.connect()  # Establish DuckDB connection
-    conn.register("df", df)  # Register Pandas DataFrame as DuckDB table
-    conn.register("daily_avg", daily_avg)  # Register daily_avg table
-
-    # Select only rolling averages from daily_avg to prevent duplicate columns
-    select_rolling_avgs = ", ".join([f"daily_avg.{col}" for col in rolling_avg_cols])
-
-    df_merged = conn.execute(f"""
-        SELECT df.*, {select_rolling_avgs}
-        FROM df
-        LEFT JOIN daily_avg 
-        ON df.Origin = daily_avg.Origin AND df.FlightDate = daily_avg.FlightDate
-    """).fetchdf()  # Convert result back to Pandas DataFrame
-
-    conn.close()  # Close DuckDB connection
-    return df_merged
+        logger.error("Error merging %s: %s", merged_years, e)
+        return []
+
+def sort_flights(df):
+    """
+    Sorts flights by Origin, FlightDate and scheduled departure, the order the per-flight features rely on.
+
+    The merged rows arrive in no particular order, so flights departing at the same minute are
+    further ordered by Airline, Dest and scheduled arrival, and flights tied on all of those by
+    their remaining own columns (TIE_BREAK_COLS). Rows still tied are identical in every column,
+    so the resulting features and split do not depend on the order the rows were read in.
+    """
+    df.sort_values(by=SORT_KEYS, inplace=True)
+
+    # Re-sort only the rows tied on every key; sorting the whole frame on the float columns costs ~10x
+    keys = [df[col].cat.codes.to_numpy() if isinstance(df[col].dtype, pd.CategoricalDtype) else df[col].to_numpy() for col in SORT_KEYS]
+    start = group_starts(*keys)
+    tied = np.flatnonzero(np.bincount(start, minlength=len(df))[start] > 1)
+    if len(tied):
+        # np.lexsort sorts by its last key first: the run, then TIE_BREAK_COLS in order
+        tie_keys = [df[col].to_numpy(dtype=float)[tied] for col in reversed(TIE_BREAK_COLS)]
+        positions = np.arange(len(df))
+        positions[tied] = tied[np.lexsort(tie_keys + [start[tied]])]
+        df = df.take(positions)
+    return df
+
+def group_starts(*keys):
+    """
+    Returns, for every row, the index of the first row of its group.
+
+    Rows must be contiguous per group, so a group starts wherever any key changes from the
+    previous row; no hashing of the key combinations is needed.
+
+    Args:
+        *keys (ndarray): Group keys in row order, all of the same length.
+
+    Returns:
+        ndarray: Index of the first row of each row's group.
+    """
+    n = len(keys[0])
+    is_start = np.zeros(n, dtype=bool)
+    is_start[:1] = True
+    for key in keys:
+        is_start[1:] |= key[1:] != key[:-1]
+    return np.maximum.accumulate(np.where(is_start, np.arange(n), 0))
+
+def past_rolling_means(values, group_ids, windows):
+    """
+    Computes, for every row, the mean of up to `window` preceding values in the same group.
+
+    Rows must be contiguous per group and in chronological order. One prefix sum over the
+    values (and one over their non-NaN count) serves every window, so each extra window
+    costs a few vectorized index operations instead of another pass over the groups.
+
+    Args:
+        values (ndarray): Values in row order.
+        group_ids (ndarray): Group code of each row.
+        windows (list): Window sizes, in preceding rows.
+
+    Returns:
+        ndarray: Array of shape (len(values), len(windows)); NaN where a row has no
+        non-NaN predecessor in its group.
+    """
+    n = len(values)
+    rows = np.arange(n)
+    group_start = group_starts(group_ids)
+
+    # Running totals with a leading zero: sums[k] covers rows [0, k)
+    valid = ~np.isnan(values)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, values, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
+
+    out = np.empty((n, len(windows)))
+    for j, window in enumerate(windows):
+        # Preceding rows [lo, i) of the same group, excluding the current row
+        lo = np.maximum(rows - window, group_start)
+        window_sum = sums[rows] - sums[lo]
+        window_count = counts[rows] - counts[lo]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out[:, j] = np.where(window_count > 0, window_sum / window_count, np.nan)
+    return out
 
 def add_rolling_flight_avg(df, column='DepDelayMinutes', windows=[10, 50, 100]):
-    """Computes rolling average delay for past flights per Origin for multiple window sizes."""
-    
-    # Optimize memory usage
-    df['Origin'] = df['Origin'].astype('category')
-
-    # Sort by Origin, FlightDate, and TimeSinceMidnight for proper chronological order
-    df.sort_values(by=['Origin', 'FlightDate', 'CRSDepTime'], inplace=True)
-
-    # Compute rolling averages for each specified window size
-    for window in windows:
-        df[f'past_{window}_avg_delay'] = (
-            df.groupby('Origin', observed=True)[column]
-            .transform(lambda x: x.shift(1).rolling(window=window, min_periods=1).mean())
-            .bfill().ffill()
-        )
+    """
+    Computes rolling average delay for past flights per Origin for multiple window sizes.
+
+    Expects `df` sorted chronologically within each Origin (see `sort_flights`).
+    """
 
-    df['Origin'] = df['Origin'].astype(str)
+    # All windows come from one pass over the sorted delays
+    means = past_rolling_means(df[column].to_numpy(dtype=float), df['Origin'].cat.codes.to_numpy(), windows)
+
+    # The first flight at each Origin has no history and stays NaN
+    for j, window in enumerate(windows):
+        df[f'past_{window}_avg_delay'] = means[:, j]
 
     return df
 
 def add_cumulative_flight_count(df):
-    """Adds a column counting the number of flights before each flight on the same day and at the same origin."""
-    
-    # Sort by Origin, FlightDate, and TimeSinceMidnight for correct order
-    df.sort_values(by=['Origin', 'FlightDate', 'CRSDepTime'], inplace=True)
-    
-    # Compute cumulative count of flights before each flight on the same day and location
-    df['cumulative_flights_before'] = df.groupby(['Origin', 'FlightDate']).cumcount()
+    """
+    Adds a column counting the number of flights before each flight on the same day and at the same origin.
+
+    Expects `df` sorted chronologically within each Origin (see `sort_flights`).
+    """
+
+    # Compute cumulative count of flights before each flight on the same day and location:
+    # the sorted rows of each (Origin, FlightDate) are contiguous, so it is the offset from the group's first row
+    start = group_starts(df['Origin'].cat.codes.to_numpy(), df['FlightDate'].to_numpy())
+    df['cumulative_flights_before'] = np.arange(len(df)) - start
     
     return df
 
@@ -264,84 +331,168 @@ def drop_and_scale(df, exclude_cols=[
     'Month_sin', 'Month_cos', 'Holiday_Indicator', 'Near_Holiday',
     'Weekend_Indicator', 'Working_Day', 'DepDelayMinutes', 'DepDel15']):
 
-    """Drops all NaN values, scales numerical features"""
+    """
+    Drops all NaN values, scales numerical features.
+
+    Standardizes like sklearn's StandardScaler (population std, constant columns left at
+    zero), but on a single float64 copy of the numerical columns that is scaled in place.
+    """
     # Drop NaN values
     df.dropna(inplace=True)
 
     # Identify numerical columns for scaling (excluding specified columns)
     num_cols = [col for col in df.columns if col not in exclude_cols]
 
-    # Convert numerical columns to float BEFORE scaling to avoid dtype issues
-    df[num_cols] = df[num_cols].astype(float)
-
-    # Initialize scaler and scale numerical features
-    scaler = StandardScaler()
-    df.loc[:, num_cols] = scaler.fit_transform(df.loc[:, num_cols])
+    # Convert numerical columns to float once, then scale that buffer in place
+    values = df[num_cols].to_numpy(dtype=float)
+    mean = values.mean(axis=0)
+    std = values.std(axis=0)
+    np.subtract(values, mean, out=values)
+    np.divide(values, np.where(std > 0, std, 1.0), out=values)
+    df[num_cols] = values
 
     return df
 
-def train_test_split_encoder(df, cat_cols=["Airline", "Origin", "Dest", "AirTimeCategory", "DistanceCategory"], target_col="DepDel15"):
-    """Performs a train-test split and applies Target Encoding to categorical features."""
-    y = df[target_col]
-    X = df.drop(columns=[target_col])
+def hash_split_mask(n_rows, test_size=0.2, seed=42):
+    """
+    Deterministically assigns rows to the test split by hashing their position.
 
-    # Split dataset
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    Unlike a shuffled split no permutation is materialized, and the frame keeps its order.
 
-    # Apply Target Encoding
-    encoder = TargetEncoder(random_state=42)
-    X_train.loc[:, cat_cols] = encoder.fit_transform(X_train[cat_cols], y_train)
-    X_test.loc[:, cat_cols] = encoder.transform(X_test[cat_cols])
+    Args:
+        n_rows (int): Number of rows to assign.
+        test_size (float): Fraction of rows assigned to the test split, rounded to a whole percent.
+        seed (int): Salt for the hash, so a different seed gives a different split.
 
-    # Attach target column back safely
-    X_train.loc[:, target_col] = y_train
-    X_test.loc[:, target_col] = y_test
+    Returns:
+        ndarray: Boolean mask that is True for test rows.
+    """
+    hashes = pd.util.hash_array(np.arange(n_rows, dtype=np.int64), hash_key=str(seed).zfill(16))
+    return hashes % 100 < round(test_size * 100)
 
-    return X_train, X_test
+def smoothed_target_means(counts, sums, sq_sums, y_mean, y_var):
+    """
+    Shrinks per-category target means toward the global mean with an empirical Bayes weight.
+
+    The weight n * var(y) / (n * var(y) + var_i) is the one sklearn's TargetEncoder uses with
+    smooth="auto"; categories without rows get the global mean. Arrays broadcast, so per-fold
+    statistics can be passed as (folds, categories) with y_mean and y_var of shape (folds, 1).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = sums / counts
+        variances = sq_sums / counts - means ** 2
+        weight = counts * y_var / (counts * y_var + variances)
+        encodings = weight * means + (1 - weight) * y_mean
+    return np.where(counts > 0, encodings, y_mean)
+
+def target_encode(train_codes, y, test_codes, n_categories, folds=TARGET_ENCODER_FOLDS, seed=42):
+    """
+    Target-encodes one categorical column for the train and test splits.
+
+    Test rows are encoded with statistics from the whole training split. Training rows are
+    cross-fitted: each row is encoded from the other folds only, so its own target never
+    leaks into its feature. All statistics come from a single bincount per moment.
+
+    Args:
+        train_codes (ndarray): Category codes of the training rows.
+        y (ndarray): Target values of the training rows.
+        test_codes (ndarray): Category codes of the test rows.
+        n_categories (int): Number of categories the codes index into.
+        folds (int): Number of cross-fitting folds.
+        seed (int): Salt for the hash that assigns training rows to folds.
+
+    Returns:
+        tuple: Encoded training values and encoded test values.
+    """
+    fold = (pd.util.hash_array(np.arange(len(train_codes), dtype=np.int64), hash_key=str(seed).zfill(16)) % folds).astype(np.intp)
+
+    # Per-fold count, sum and sum of squares of the target for every category
+    flat = fold * n_categories + train_codes
+    size = folds * n_categories
+    fold_counts = np.bincount(flat, minlength=size).reshape(folds, n_categories)
+    fold_sums = np.bincount(flat, weights=y, minlength=size).reshape(folds, n_categories)
+    fold_sq_sums = np.bincount(flat, weights=y * y, minlength=size).reshape(folds, n_categories)
+    counts, sums, sq_sums = fold_counts.sum(axis=0), fold_sums.sum(axis=0), fold_sq_sums.sum(axis=0)
+
+    # Test rows: statistics of the full training split
+    full = smoothed_target_means(counts, sums, sq_sums, y.mean(), y.var())
+
+    # Training rows: statistics of every fold but their own
+    rest_n = len(y) - fold_counts.sum(axis=1, keepdims=True)
+    rest_mean = (sums.sum() - fold_sums.sum(axis=1, keepdims=True)) / rest_n
+    rest_var = (sq_sums.sum() - fold_sq_sums.sum(axis=1, keepdims=True)) / rest_n - rest_mean ** 2
+    out_of_fold = smoothed_target_means(counts - fold_counts, sums - fold_sums, sq_sums - fold_sq_sums, rest_mean, rest_var)
+
+    return out_of_fold[fold, train_codes], full[test_codes]
+
+def train_test_split_encoder(df, cat_cols=CATEGORICAL_COLS, target_col="DepDel15"):
+    """
+    Performs a train-test split and applies Target Encoding to categorical features.
+
+    `cat_cols` are expected as pandas categoricals; they are encoded from their integer
+    codes, which both splits share because they keep the same categories.
+    """
+    # Split dataset, keeping the target as the last column
+    columns = [col for col in df.columns if col != target_col] + [target_col]
+    test_mask = hash_split_mask(len(df))
+    train_df = df.loc[~test_mask, columns]
+    test_df = df.loc[test_mask, columns]
+
+    # Apply Target Encoding, fit on the training split only
+    y = train_df[target_col].to_numpy(dtype=float)
+    for col in cat_cols:
+        train_df[col], test_df[col] = target_encode(
+            train_df[col].cat.codes.to_numpy(), y, test_df[col].cat.codes.to_numpy(), len(train_df[col].cat.categories)
+        )
+
+    return train_df, test_df
+
+def save_split(df, path):
+    """Writes one train/test split to Parquet; pyarrow releases the GIL while encoding, so splits can be written concurrently."""
+    df.to_parquet(path, index=False, compression="zstd", compression_level=3, use_dictionary=True, data_page_size=1 << 20)
 
 # ─── Main Execution ──────────────────────────────────────────────────────────
-if __name__ == "__main__":
-    rich_logger.info("Starting flight and weather data merge")
-    file_logger.info("Starting flight and weather data merge")
+def main():
+    """Merges flight and weather data and saves the final train/test splits."""
+    logger.info("Starting flight and weather data merge")
 
-    merged_dataframes = []
+    # One DuckDB connection serves the merge and its rolling averages
+    con = connect_duckdb()
 
     with Progress(SpinnerColumn(), TextColumn("{task.description}")) as progress:
-        # Multi-threaded Merging Step
-        merge_tasks = {}
-
-        with ThreadPoolExecutor() as executor:
-            for year in YEARS:
-                task_id = progress.add_task(f"Merging {year}...")
-                future = executor.submit(merge_flight_weather, year, progress, task_id)
-                merge_tasks[future] = year
-
-            for future in as_completed(merge_tasks):
-                merged_df = future.result()
-                if merged_df is not None:
-                    merged_dataframes.append(merged_df)
-
-        if merged_dataframes:
-            # Concatenation Step
-            concat_task = progress.add_task("Concatenating datasets...")
-            file_logger.info("Concatenating datasets...")
-            final_df = pd.concat(merged_dataframes, ignore_index=True)
-            del merged_dataframes  # Free up memory
-            progress.remove_task(concat_task)
-            rich_logger.info("Successfully concatenated datasets")
-            file_logger.info("Successfully concatenated datasets")
+        # Merging Step
+        merge_task = progress.add_task("Merging flight and weather data...")
+        merged_years = merge_flight_weather(con, YEARS, MERGED_DIR)
+        progress.remove_task(merge_task)
+
+        if merged_years:
+            # Loading Step
+            load_task = progress.add_task("Loading merged dataset...")
+            file_logger.info("Loading merged dataset...")
+            # Stream every partition's row groups into one Arrow table; the Year key only lives
+            # in the directory names and is not kept as a feature
+            merged = ds.dataset(MERGED_DIR, format="parquet", partitioning="hive")
+            columns = [name for name in merged.schema.names if name != "Year"]
+            # Arrow buffers are released column by column as they are converted, so the table
+            # and the DataFrame are never both fully resident
+            final_df = merged.to_table(columns=columns).to_pandas(split_blocks=True, self_destruct=True)
+
+            # Dictionary-encode the string features once; grouping, sorting and encoding then work on int codes
+            final_df[CATEGORICAL_COLS] = final_df[CATEGORICAL_COLS].astype("category")
+            # Only the day order matters from here on, so keep FlightDate as int32 days since epoch
+            final_df['FlightDate'] = final_df['FlightDate'].to_numpy().astype('datetime64[D]').astype(np.int32)
+            progress.remove_task(load_task)
+            logger.info("Successfully loaded merged dataset")
 
             # Rolling Averages Step
             rolling_task = progress.add_task("Applying rolling averages...")
             file_logger.info("Applying rolling averages...")
-            final_df = add_rolling_averages_weather(final_df)
-            final_df = add_rolling_averages_delays(final_df)
+            final_df = sort_flights(final_df)
             final_df = add_rolling_flight_avg(final_df)
             final_df = add_cumulative_flight_count(final_df)
             final_df.drop('FlightDate', axis=1, inplace=True)
             progress.remove_task(rolling_task)
-            rich_logger.info("Successfully applied rolling averages")
-            file_logger.info("Successfully applied rolling averages")
+            logger.info("Successfully applied rolling averages")
 
             # Train-Test Split Step
             split_task = progress.add_task("Encoding and splitting data...")
@@ -350,8 +501,7 @@ if __name__ == "__main__":
             train_data, test_data = train_test_split_encoder(final_df)
             del final_df  # Free up memory
             progress.remove_task(split_task)
-            rich_logger.info("Successfully encoded and split data")
-            file_logger.info("Successfully encoded and split data")
+            logger.info("Successfully encoded and split data")
 
             # Saving Train/Test Data
             save_task = progress.add_task("Saving train/test splits...")
@@ -359,18 +509,23 @@ if __name__ == "__main__":
             train_path = os.path.join(SAVE_DIR, "train_data.parquet")
             test_path = os.path.join(SAVE_DIR, "test_data.parquet")
 
-            train_data.to_parquet(train_path, index=False)
-            test_data.to_parquet(test_path, index=False)
+            # Encode and compress both splits at the same time
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                futures = [executor.submit(save_split, train_data, train_path), executor.submit(save_split, test_data, test_path)]
+                for future in as_completed(futures):
+                    future.result()
 
-            rich_logger.info(f"Saved train/test splits")
-            file_logger.info(f"Saved train/test splits")
+            logger.info("Saved train/test splits")
 
             progress.remove_task(save_task)
 
         else:
-            rich_logger.warning("No valid data was merged.")
-            file_logger.warning("No valid data was merged.")
+            logger.warning("No valid data was merged.")
+
+    con.close()
 
     # Log completion message
-    rich_logger.info("All data finalization complete")
-    file_logger.info("All data finalization complete")
\ No newline at end of file
+    logger.info("All data finalization complete")
+
+if __name__ == "__main__":
+    main()
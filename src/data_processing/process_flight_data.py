@@ -30,7 +30,7 @@ os.makedirs(SAVE_DIR, exist_ok=True)
 
 # ─── Setup Loggers ───────────────────────────────────────────────────────────
 LOG_FILENAME = "flight_data_processing"
-rich_logger, file_logger = setup_loggers(LOG_FILENAME)
+logger, file_logger = setup_loggers(LOG_FILENAME)
 
 # ─── Helper Functions for Data Transformations ───────────────────────────────
 def undersample_delays(df):
@@ -45,39 +45,49 @@ def undersample_delays(df):
 def convert_flight_date(df):
     """Converts FlightDate from YYYYMMDD format to a proper datetime format."""
     if "FlightDate" in df.columns:
-        df["FlightDate"] = pd.to_datetime(df["FlightDate"], format="%Y%m%d")
+        # Parquet sources already store a timestamp; only strings need parsing
+        if not pd.api.types.is_datetime64_any_dtype(df["FlightDate"]):
+            df["FlightDate"] = pd.to_datetime(df["FlightDate"], format="%Y%m%d", cache=True)
         df["FlightDate"] = df["FlightDate"].dt.floor("D")
     return df
 
+def bin_categories(values, edges):
+    """
+    Labels values "0", "1", ... by the bin they fall in, with "Unknown" for missing values.
+
+    Bins are closed on the left, so `edges` [120, 360] gives "0" below 120, "1" from 120 up to
+    360 and "2" from 360 on. The labels come back as a categorical: one pass of np.digitize
+    yields the int8 codes, and each label string is stored once instead of per row.
+
+    Args:
+        values (Series): Values to categorize.
+        edges (list): Ascending inner bin edges.
+
+    Returns:
+        Categorical: Bin label of every value.
+    """
+    values = values.to_numpy(dtype=float)
+    codes = np.digitize(values, edges).astype(np.int8)
+    codes[np.isnan(values)] = len(edges) + 1
+    labels = [str(i) for i in range(len(edges) + 1)] + ["Unknown"]
+    return pd.Categorical.from_codes(codes, categories=labels)
+
 def categorize_airtime(df):
     """Categorizes flights based on airtime duration."""
     if "AirTime" in df.columns:
-        df["AirTimeCategory"] = np.select([
-            (df["AirTime"] < 120),
-            (df["AirTime"] >= 120) & (df["AirTime"] < 360),
-            (df["AirTime"] >= 360)
-        ], [0, 1, 2], default="Unknown")
+        df["AirTimeCategory"] = bin_categories(df["AirTime"], [120, 360])
     return df
 
 def categorize_distance(df):
     """Categorizes flights based on airtime duration."""
     if "Distance" in df.columns:
-        df["DistanceCategory"] = np.select([
-            (df["Distance"] < 500),
-            (df["Distance"] >= 500) & (df["Distance"] < 2500),
-            (df["Distance"] >= 2500)
-        ], [0, 1, 2], default="Unknown")
+        df["DistanceCategory"] = bin_categories(df["Distance"], [500, 2500])
     return df
 
 def categorize_time_of_day(df):
     """Assigns a time-of-day category based on departure time."""
     if "CRSDepTime" in df.columns:
-        df["TimeofDay"] = np.select([
-            (df["CRSDepTime"] < 600),
-            (df["CRSDepTime"] >= 600) & (df["CRSDepTime"] < 1200),
-            (df["CRSDepTime"] >= 1200) & (df["CRSDepTime"] < 1800),
-            (df["CRSDepTime"] >= 1800)
-        ], [0, 1, 2, 3], default="Unknown")
+        df["TimeofDay"] = bin_categories(df["CRSDepTime"], [600, 1200, 1800])
     return df
 
 def convert_military_time(df):
@@ -104,7 +114,6 @@ def add_cyclical_features(df):
 def add_holiday_indicators(df):
     """Adds a holiday indicator and a 'near holiday' flag based on U.S. holiday data."""
     if "FlightDate" in df.columns:
-        df["FlightDate"] = pd.to_datetime(df["FlightDate"])  # Ensure it's datetime
         us_holidays = pd.to_datetime(list(holidays.US(years=range(2018, 2023)).keys()))  # Convert holidays to datetime
 
         # Fast holiday indicator using vectorized .isin()
@@ -145,13 +154,11 @@ def clean_flight_file(file_path, progress, task_id):
 
     try:
         # Log processing start
-        rich_logger.info(f"Started processing {filename}")
-        file_logger.info(f"Started processing {filename}")
+        logger.info("Started processing %s", filename)
         progress.update(task_id, description=f"Loading {filename}...")
 
         df = pd.read_parquet(file_path, columns=KEEP_COLUMNS)
-        rich_logger.info(f"Loaded {filename} with {df.shape[0]} rows and {df.shape[1]} columns")
-        file_logger.info(f"Loaded {filename} with {df.shape[0]} rows and {df.shape[1]} columns")
+        logger.info("Loaded %s with %s rows and %s columns", filename, df.shape[0], df.shape[1])
         progress.update(task_id, description=f"Applying transformations to {filename}...")
 
         # Define transformation steps with logging
@@ -170,48 +177,43 @@ def clean_flight_file(file_path, progress, task_id):
 
         for step_desc, step_func in steps:
             progress.update(task_id, description=f"Working on {step_desc} for {filename}...")
-            file_logger.info(f"Working on {step_desc} for {filename}...")
+            file_logger.info("Working on %s for %s...", step_desc, filename)
             df = step_func(df)
-            rich_logger.info(f"Successfully completed {step_desc} for {filename}")
-            file_logger.info(f"Successfully completed {step_desc} for {filename}")
+            logger.info("Successfully completed %s for %s", step_desc, filename)
 
         # Save processed data
         progress.update(task_id, description=f"Saving processed file {filename}...")
-        df.to_parquet(save_path, index=False)
-        rich_logger.info(f"Saved processed file: {save_path}")
-        file_logger.info(f"Saved processed file: {save_path}")
+        df.to_parquet(save_path, index=False, compression="zstd", compression_level=3, use_dictionary=True, data_page_size=1 << 20)
+        logger.info("Saved processed file: %s", save_path)
         del df  # Free up memory
 
         if DELETE_SOURCE:
             os.remove(file_path)
-            rich_logger.info(f"Deleted raw Flight parquet file: {file_path}")
-            file_logger.info(f"Deleted raw Flight parquet file: {file_path}")
+            logger.info("Deleted raw Flight parquet file: %s", file_path)
 
         # Final success log
-        rich_logger.info(f"Successfully processed {filename}")
-        file_logger.info(f"Successfully processed {filename}")
+        logger.info("Successfully processed %s", filename)
 
     except Exception as e:
         # Log processing failure
-        rich_logger.error(f"Error processing {filename}: {e}")
-        file_logger.error(f"Error processing {filename}: {e}")
+        logger.error("Error processing %s: %s", filename, e)
 
     finally:
         # Remove task from progress display after completion
         progress.remove_task(task_id)
 
 # ─── Main Execution ──────────────────────────────────────────────────────────
-if __name__ == "__main__":
-    rich_logger.info("Starting flight data processing")
-    file_logger.info("Starting flight data processing")
+def main():
+    """Cleans all extracted flight Parquet files in the source directory."""
+    logger.info("Starting flight data processing")
     
     # Identify all Parquet files in the source directory
-    flight_files = [os.path.join(SOURCE_DIR, f) for f in os.listdir(SOURCE_DIR) if f.endswith(".parquet")]
+    with os.scandir(SOURCE_DIR) as entries:
+        flight_files = [e.path for e in entries if e.is_file() and e.name.endswith(".parquet")]
     
     if not flight_files:
         # Log warning if no files are found
-        rich_logger.warning("No extracted flight parquet files found in the source directory")
-        file_logger.warning("No extracted flight parquet files found in the source directory")
+        logger.warning("No extracted flight parquet files found in the source directory")
     else:
         # Initialize a progress task with a spinner indicator
         with Progress(SpinnerColumn(), TextColumn("{task.description}")) as progress:
@@ -229,5 +231,7 @@ if __name__ == "__main__":
                     future.result()
     
     # Log completion message
-    rich_logger.info("All flight data processing complete")
-    file_logger.info("All flight data processing complete")
\ No newline at end of file
+    logger.info("All flight data processing complete")
+
+if __name__ == "__main__":
+    main()
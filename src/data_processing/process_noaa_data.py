@@ -37,9 +37,9 @@ valid_stations = set(station_key_df["Closest_Station"].astype(str))  # Set of va
 station_mapping = dict(zip(station_key_df["Closest_Station"].astype(str), station_key_df["Airport"]))  # Mapping
 
 # ─── Setup Loggers ───────────────────────────────────────────────────────────
-# Initialize logging for console (rich_logger) and file output (file_logger)
+# Initialize logging for console + file output (logger) and file-only output (file_logger)
 LOG_FILENAME = "noaa_processing"
-rich_logger, file_logger = setup_loggers(LOG_FILENAME)
+logger, file_logger = setup_loggers(LOG_FILENAME)
 
 # ─── Data Cleaning Function ──────────────────────────────────────────────────
 def clean_noaa_file(file_path, progress, task_id):
@@ -58,7 +58,7 @@ def clean_noaa_file(file_path, progress, task_id):
 
     try:
         # Log processing start
-        file_logger.info(f"Loading {filename}...")
+        file_logger.info("Loading %s...", filename)
         progress.update(task_id, description=f"Loading {filename}...")
 
         # Load the CSV file
@@ -69,40 +69,34 @@ def clean_noaa_file(file_path, progress, task_id):
             dtype={"STATION": str, "DATE": str, "ELEMENT": str, "VALUE": float},
             skiprows=1  
         )
-        rich_logger.info(f"Loaded {filename} with {df.shape[0]} rows")
-        file_logger.info(f"Loaded {filename} with {df.shape[0]} rows")
+        logger.info("Loaded %s with %s rows", filename, df.shape[0])
         progress.update(task_id, description=f"Filtering stations for {filename}...")
 
         # Filter relevant stations
         df = df[df["STATION"].isin(valid_stations)]
-        rich_logger.info(f"Filtered stations for {filename}, remaining: {df.shape[0]} rows")
-        file_logger.info(f"Filtered stations for {filename}, remaining: {df.shape[0]} rows")
+        logger.info("Filtered stations for %s, remaining: %s rows", filename, df.shape[0])
         progress.update(task_id, description=f"Filtering elements for {filename}...")
 
         # Filter relevant elements
         df = df[df["ELEMENT"].isin(CORE_ELEMENTS)]
-        rich_logger.info(f"Filtered elements for {filename}, remaining: {df.shape[0]} rows")
-        file_logger.info(f"Filtered elements for {filename}, remaining: {df.shape[0]} rows")
+        logger.info("Filtered elements for %s, remaining: %s rows", filename, df.shape[0])
         progress.update(task_id, description=f"Replacing station codes for {filename}...")
 
         # Replace station IDs with corresponding airport codes
         df["STATION"] = df["STATION"].map(station_mapping)
-        rich_logger.info(f"Replaced station codes for {filename}")
-        file_logger.info(f"Replaced station codes for {filename}")
+        logger.info("Replaced station codes for %s", filename)
         progress.update(task_id, description=f"Converting date format for {filename}...")
 
         # Convert date format
         df["DATE"] = pd.to_datetime(df["DATE"], format="%Y%m%d")
         df["DATE"] = df["DATE"].dt.floor("D")
-        rich_logger.info(f"Converted date format for {filename}")
-        file_logger.info(f"Converted date format for {filename}")
+        logger.info("Converted date format for %s", filename)
         progress.update(task_id, description=f"Pivoting data for {filename}...")
 
         # Pivot data (ELEMENT values as separate columns)
         df = df.pivot_table(index=["STATION", "DATE"], columns="ELEMENT", values="VALUE", aggfunc="first")
         df.reset_index(inplace=True)
-        rich_logger.info(f"Pivoted data for {filename}")
-        file_logger.info(f"Pivoted data for {filename}")
+        logger.info("Pivoted data for %s", filename)
         progress.update(task_id, description=f"Handling missing values for {filename}...")
 
         # Ensure all core elements exist (fill missing ones with NaN)
@@ -110,47 +104,42 @@ def clean_noaa_file(file_path, progress, task_id):
 
         # Replace missing values for specific elements with 0
         df[list(ZERO_OUT_ELEMENTS)] = df[list(ZERO_OUT_ELEMENTS)].fillna(0)
-        rich_logger.info(f"Handled missing values for {filename}")
-        file_logger.info(f"Handled missing values for {filename}")
+        logger.info("Handled missing values for %s", filename)
         progress.update(task_id, description=f"Saving processed file {filename}...")
 
         # Save cleaned data
-        df.to_parquet(save_path, index=False)
-        rich_logger.info(f"Saved processed file: {save_path}")
-        file_logger.info(f"Saved processed file: {save_path}")
+        df.to_parquet(save_path, index=False, compression="zstd", compression_level=3, use_dictionary=True, data_page_size=1 << 20)
+        logger.info("Saved processed file: %s", save_path)
         del df  # Free up memory
 
         # Optionally delete the original CSV file
         if DELETE_SOURCE:
             os.remove(file_path)
-            rich_logger.info(f"Deleted raw NOAA csv file: {file_path}")
-            file_logger.info(f"Deleted raw NOAA csv file: {file_path}")
+            logger.info("Deleted raw NOAA csv file: %s", file_path)
 
         # Final success log
-        rich_logger.info(f"Successfully processed {filename}")
-        file_logger.info(f"Successfully processed {filename}")
+        logger.info("Successfully processed %s", filename)
 
     except Exception as e:
         # Log failure
-        rich_logger.error(f"Error processing {filename}: {e}")
-        file_logger.error(f"Error processing {filename}: {e}")
+        logger.error("Error processing %s: %s", filename, e)
 
     finally:
         # Remove task from progress display after completion
         progress.remove_task(task_id)
 
 # ─── Main Execution ──────────────────────────────────────────────────────────
-if __name__ == "__main__":
-    rich_logger.info(f"Starting NOAA data processing")
-    file_logger.info(f"Starting NOAA data processing")
+def main():
+    """Cleans all extracted NOAA CSV files in the source directory."""
+    logger.info("Starting NOAA data processing")
     
     # Get all csv files in the extracted directory
-    raw_files = [os.path.join(SOURCE_DIR, f) for f in os.listdir(SOURCE_DIR) if f.endswith(".csv")]
+    with os.scandir(SOURCE_DIR) as entries:
+        raw_files = [e.path for e in entries if e.is_file() and e.name.endswith(".csv")]
 
     if not raw_files:
         # Log warning if no files are found
-        rich_logger.warning("No extracted NOAA CSV files found in the source directory")
-        file_logger.warning("No extracted NOAA CSV files found in the source directory")
+        logger.warning("No extracted NOAA CSV files found in the source directory")
     else:
         # Initialize a progress task with a spinner indicator
         with Progress(SpinnerColumn(), TextColumn("{task.description}")) as progress:
@@ -168,5 +157,7 @@ if __name__ == "__main__":
                     future.result()
 
         # Log completion message
-        rich_logger.info("All NOAA data processing complete")
-        file_logger.info("All NOAA data processing complete")
\ No newline at end of file
+        logger.info("All NOAA data processing complete")
+
+if __name__ == "__main__":
+    main()
@@ -33,9 +33,9 @@ SAVE_DIR = config["paths"]["trained_models"]    # Directory where trained models
 os.makedirs(SAVE_DIR, exist_ok=True)
 
 # ─── Setup Loggers ───────────────────────────────────────────────────────────
-# Initialize logging for console (rich_logger) and file output (file_logger)
+# Initialize logging for console + file output (logger) and file-only output (file_logger)
 LOG_FILENAME = "train_models"
-rich_logger, file_logger = setup_loggers(LOG_FILENAME)
+logger, file_logger = setup_loggers(LOG_FILENAME)
 
 # ─── Training Function ───────────────────────────────────────────────────────
 def train_model(model_name, base=False):
@@ -47,8 +47,7 @@ def train_model(model_name, base=False):
     model_config = MODEL_CONFIG.get(model_name)
     
     if not model_config:
-        rich_logger.error(f"Model '{model_name}' not found in config file.")
-        file_logger.error(f"Model '{model_name}' not found in config file.")
+        logger.error("Model '%s' not found in config file.", model_name)
         return
     
     # # Check if the target column is DepDelayMinutes and filter accordingly
@@ -86,17 +85,15 @@ def train_model(model_name, base=False):
     elif model_name == "mlp_clf":
         model = MLPClassifier(**model_params)
     else:
-        rich_logger.error("Unsupported model type")
-        file_logger.error("Unsupported model type")
+        logger.error("Unsupported model type")
         return
     
     mode_label = "base model" if base else "parameter-tuned model"
-    rich_logger.info(f"Starting {mode_label} training for {model_name}")
-    file_logger.info(f"Starting {mode_label} training for {model_name}")
+    logger.info("Starting %s training for %s", mode_label, model_name)
     
     with Progress(SpinnerColumn(), TextColumn("{task.description}")) as progress:
         train_task = progress.add_task(f"Training {model_name} ({mode_label})...")
-        file_logger.info(f"Training {model_name} ({mode_label})...")
+        file_logger.info("Training %s (%s)...", model_name, mode_label)
 
         # Capture warnings and log them
         with warnings.catch_warnings(record=True) as w:
@@ -104,18 +101,15 @@ def train_model(model_name, base=False):
             try:
                 model.fit(X, y)
             except Exception as e:
-                rich_logger.error(f"Training failed for {model_name}: {e}")
-                file_logger.error(f"Training failed for {model_name}: {e}")
+                logger.error("Training failed for %s: %s", model_name, e)
                 raise
             
             for warning in w:
                 warning_message = f"{warning.category.__name__}: {warning.message}"
-                rich_logger.warning(warning_message)
-                file_logger.warning(warning_message)
+                logger.warning(warning_message)
                 
         progress.remove_task(train_task)
-        rich_logger.info(f"Successfully trained {model_name} ({mode_label})")
-        file_logger.info(f"Successfully trained {model_name} ({mode_label})")
+        logger.info("Successfully trained %s (%s)", model_name, mode_label)
     
     # Create model-specific folder
     model_dir = os.path.join(SAVE_DIR, model_name)
@@ -123,7 +117,7 @@ def train_model(model_name, base=False):
 
     # Save model
     save_task = progress.add_task(f"Saving {model_name} ({mode_label}) model...")
-    file_logger.info(f"Saving {model_name} ({mode_label}) model...")
+    file_logger.info("Saving %s (%s) model...", model_name, mode_label)
     
     model_suffix = "_base" if base else "_tuned"
     model_filename = f"{model_name}{model_suffix}.pkl"
@@ -134,8 +128,7 @@ def train_model(model_name, base=False):
     
     progress.remove_task(save_task)
     
-    rich_logger.info(f"Model saved to {model_path}")
-    file_logger.info(f"Model saved to {model_path}")
+    logger.info("Model saved to %s", model_path)
 
 # ─── Main Execution ──────────────────────────────────────────────────────────
 if __name__ == "__main__":
@@ -33,9 +33,9 @@ SAVE_DIR = config["paths"]["trained_models"]    # Directory where trained models
 os.makedirs(SAVE_DIR, exist_ok=True)
 
 # ─── Setup Loggers ───────────────────────────────────────────────────────────
-# Initialize logging for console (rich_logger) and file output (file_logger)
+# Initialize logging for console + file output (logger) and file-only output (file_logger)
 LOG_FILENAME = "tune_hyperparameters"
-rich_logger, file_logger = setup_loggers(LOG_FILENAME)
+logger, file_logger = setup_loggers(LOG_FILENAME)
 
 # ─── Hyperparameter Tuning Function ──────────────────────────────────────────
 def train_model_with_tuning(model_name):
@@ -44,8 +44,7 @@ def train_model_with_tuning(model_name):
     model_config = MODEL_CONFIG.get(model_name)
     
     if not model_config:
-        rich_logger.error(f"Model '{model_name}' not found in config file")
-        file_logger.error(f"Model '{model_name}' not found in config file")
+        logger.error("Model '%s' not found in config file", model_name)
         return
 
     # # Check if the target column is DepDelayMinutes and filter accordingly
@@ -53,8 +52,7 @@ def train_model_with_tuning(model_name):
     #     data = data[data["DepDel15"] == 1]
     
     data, _ = train_test_split(data, test_size=0.90, random_state=42, stratify=data['DepDel15'])
-    rich_logger.info(f"Sampled 10% of data set for faster tuning")
-    file_logger.info(f"Sampled 10% of data set for faster tuning")
+    logger.info("Sampled 10% of data set for faster tuning")
     
     # Select features (exclude the ones in "exclude_features")
     exclude_features = model_config.get("exclude_features", [])
@@ -86,14 +84,12 @@ def train_model_with_tuning(model_name):
     elif model_name == "mlp_clf":
         model = MLPClassifier()
     else:
-        rich_logger.error("Unsupported model type")
-        file_logger.error("Unsupported model type")
+        logger.error("Unsupported model type")
         return
     
-    rich_logger.info(f"Starting randomized hyperparameter tuning for {model_name}")
-    file_logger.info(f"Starting randomized hyperparameter tuning for {model_name}")
-    file_logger.info(f"Total possible hyperparameter combinations: {total_param_space}")
-    file_logger.info(f"Randomly sampling {total_samples} hyperparameter sets for tuning")
+    logger.info("Starting randomized hyperparameter tuning for %s", model_name)
+    file_logger.info("Total possible hyperparameter combinations: %s", total_param_space)
+    file_logger.info("Randomly sampling %s hyperparameter sets for tuning", total_samples)
     
     # # Log planned runs before training starts
     # file_logger.info("All possible hyperparameter combinations:")
@@ -109,18 +105,15 @@ def train_model_with_tuning(model_name):
             grid_search.fit(X, y)  # Will let verbose print to terminal, not captured
             print("--VERBOSE OUTPUT END--")
         except Exception as e:
-            rich_logger.error(f"Tuning failed for {model_name}: {e}")
-            file_logger.error(f"Tuning failed for {model_name}: {e}")
+            logger.error("Tuning failed for %s: %s", model_name, e)
             raise
         
         for warning in w:
             warning_message = f"{warning.category.__name__}: {warning.message}"
-            rich_logger.warning(warning_message)
-            file_logger.warning(warning_message)
+            logger.warning(warning_message)
 
     # Resume structured logging after training
-    rich_logger.info(f"Best parameters found: {grid_search.best_params_}")
-    file_logger.info(f"Best parameters found: {grid_search.best_params_}")
+    logger.info("Best parameters found: %s", grid_search.best_params_)
 
 
     # Convert cv_results_ to a DataFrame for better readability
@@ -131,8 +124,7 @@ def train_model_with_tuning(model_name):
     results_df = cv_results_df[param_columns + ["mean_test_score"]]
 
     # Log all searched parameters and their scores
-    rich_logger.info(f"All parameters searched and their scores:\n{results_df.to_string(index=False)}")
-    file_logger.info(f"All parameters searched and their scores:\n{results_df.to_string(index=False)}")
+    logger.info("All parameters searched and their scores:\n%s", results_df.to_string(index=False))
     
 
     # Create model-specific folder
@@ -145,8 +137,7 @@ def train_model_with_tuning(model_name):
     with open(gridsearch_path, "wb") as f:
         pickle.dump(grid_search, f)
         
-    rich_logger.info(f"Full grid search object saved to {gridsearch_path}")
-    file_logger.info(f"Full grid search object saved to {gridsearch_path}")
+    logger.info("Full grid search object saved to %s", gridsearch_path)
     
     # # Save the best model
     # model_filename = f"{model_name}_best_tuned.pkl"
@@ -154,8 +145,7 @@ def train_model_with_tuning(model_name):
     # with open(model_path, "wb") as f:
     #     pickle.dump(grid_search.best_estimator_, f)
     
-    # rich_logger.info(f"Tuned model saved to {model_path}")
-    # file_logger.info(f"Tuned model saved to {model_path}")
+    # logger.info("Tuned model saved to %s", model_path)
 
 # ─── Main Execution ──────────────────────────────────────────────────────────
 if __name__ == "__main__":
@@ -1,31 +1,78 @@
 import yaml
 import os
-import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
 from tqdm import tqdm
 
 # Load configuration
-with open("config/paths.yaml", "r") as f:
-    config = yaml.safe_load(f)
+config = {}
+for path in ["config/paths.yaml", "config/data.yaml"]:
+    with open(path, "r") as f:
+        config.update(yaml.safe_load(f))
 
 INPUT_DIR = config["paths"]["extracted_flight_data"]
-OUTPUT_FILE = config["paths"]["combined_parquet_file"]
+OUTPUT_DIR = config["paths"]["combined_parquet_dir"]
+KEEP_COLUMNS = config["flight_data"]["keep_columns"]
 
-def combine_parquet_files(input_dir, output_file):
-    """Combine Parquet files into a single DataFrame with a progress bar."""
-    parquet_files = [
-        os.path.join(input_dir, f) for f in os.listdir(input_dir) if f.endswith(".parquet")
-    ]
+# Let Arrow decode and read files on every available core
+pa.set_cpu_count(os.cpu_count())
+pa.set_io_thread_count(os.cpu_count())
+
+# Memory-map local files and coalesce column chunk reads into larger sequential reads
+LOCAL_FS = pafs.LocalFileSystem(use_mmap=True)
+PARQUET_FORMAT = ds.ParquetFileFormat(
+    default_fragment_scan_options=ds.ParquetFragmentScanOptions(pre_buffer=True)
+)
+
+def track_rows(batches, total_rows=None):
+    """Yield record batches unchanged while advancing a row-count progress bar on the consuming thread."""
+    with tqdm(total=total_rows, unit="rows", unit_scale=True, desc="Writing Parquet rows") as bar:
+        for batch in batches:
+            bar.update(batch.num_rows)
+            yield batch
+
+def combine_parquet_files(input_dir, output_dir, columns=None, partition_cols=("Year",), filter_expr=None):
+    """Stream Parquet files into a single hive-partitioned dataset, one batch at a time.
+
+    Only the listed `columns` are read (all columns when None), so dropped columns are never decompressed.
+    `filter_expr` is an optional `pyarrow.compute` expression (e.g. `pc.field("Cancelled") == False`)
+    evaluated by the Arrow scanner; row groups whose statistics rule it out are skipped without decoding.
+    Partitioning by `partition_cols` lets later stages read a single year instead of the full dataset.
+    """
+    with os.scandir(input_dir) as entries:
+        parquet_files = sorted(e.path for e in entries if e.is_file() and e.name.endswith(".parquet"))
     if not parquet_files:
         raise ValueError(f"No Parquet files found in {input_dir}")
 
-    combined_df = pd.concat(
-        [pd.read_parquet(f) for f in tqdm(parquet_files, desc="Reading Parquet files")], 
-        ignore_index=True
-    )
+    # Partition columns must be read even when they are not in the requested projection
+    if columns:
+        columns = list(columns) + [c for c in partition_cols if c not in columns]
 
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    combined_df.to_parquet(output_file, index=False)
-    print(f"Combined data saved to {output_file}")
+    dataset = ds.dataset(parquet_files, format=PARQUET_FORMAT, filesystem=LOCAL_FS)
+    schema = dataset.schema
+    if columns:
+        schema = pa.schema([schema.field(c) for c in columns])
+
+    scanner = dataset.scanner(columns=columns, filter=filter_expr, use_threads=True)
+
+    # Unfiltered row counts come straight from the Parquet footers; a filtered total would need a full scan
+    total_rows = dataset.count_rows() if filter_expr is None else None
+
+    write_options = ds.ParquetFileFormat().make_write_options(
+        compression="zstd", compression_level=3, use_dictionary=True, data_page_size=1 << 20
+    )
+    ds.write_dataset(
+        track_rows(scanner.to_batches(), total_rows),
+        output_dir,
+        schema=schema,
+        format="parquet",
+        partitioning=list(partition_cols),
+        partitioning_flavor="hive",
+        file_options=write_options,
+        existing_data_behavior="delete_matching",
+    )
+    print(f"Combined data saved to {output_dir}")
 
 if __name__ == "__main__":
-    combine_parquet_files(INPUT_DIR, OUTPUT_FILE)
\ No newline at end of file
+    combine_parquet_files(INPUT_DIR, OUTPUT_DIR, columns=KEEP_COLUMNS)
@@ -1,10 +1,27 @@
+import os
+import types
+import functools
 import yaml
 
+# Prefer the libyaml C parser when PyYAML was built with it
+SafeLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+@functools.lru_cache(maxsize=None)
+def _load_yaml_file(path, mtime_ns):
+    """Parses a single YAML file; cached per path and modification time."""
+    with open(path, "r") as file:
+        return yaml.load(file, Loader=SafeLoader)
+
 def load_yaml_files(file_paths):
+    """
+    Merges the top-level sections of several YAML files into one read-only mapping.
+
+    Parsed files are shared between every stage running in the pipeline process,
+    so the merged result is returned as a read-only view rather than a fresh dict.
+    """
     merged_config = {}
     for path in file_paths:
-        with open(path, "r") as file:
-            config = yaml.safe_load(file)
-            if config:
-                merged_config.update(config)
-    return merged_config
\ No newline at end of file
+        config = _load_yaml_file(path, os.stat(path).st_mtime_ns)
+        if config:
+            merged_config.update(config)
+    return types.MappingProxyType(merged_config)
@@ -6,8 +6,13 @@ from rich.logging import RichHandler
 
 # ─── Helper Function: Set Up Loggers ─────────────────────────
 def setup_loggers(log_filename):
-    """Setup separate loggers for console (Rich) and file logging, with timestamped logs."""
-    
+    """
+    Setup a console + file logger and a file-only logger, with timestamped logs.
+
+    The console logger is a child of the file logger, so a single call formats the
+    message once and dispatches it to both the Rich and the file handler.
+    """
+
     # ─ Ensure "logs/" folder exists ─
     log_dir = os.path.join(os.getcwd(), "logs")  # Always in repo root
     os.makedirs(log_dir, exist_ok=True)
@@ -16,16 +21,11 @@ def setup_loggers(log_filename):
     timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
     full_log_path = os.path.join(log_dir, f"{log_filename}_{timestamp}.log")
 
-    # ─ Console Logger (Pretty Terminal Logging) ─
-    rich_logger = logging.getLogger("console_logger")
-    rich_logger.setLevel(logging.INFO)
-
-    rich_handler = RichHandler(rich_tracebacks=True)
-    rich_logger.addHandler(rich_handler)
-
     # ─ File Logger (Save Logs to File) ─
-    file_logger = logging.getLogger("file_logger")
+    # Loggers are named per log file so several stages can share one process
+    file_logger = logging.getLogger(log_filename)
     file_logger.setLevel(logging.INFO)
+    file_logger.propagate = False
 
     file_handler = logging.FileHandler(full_log_path, mode="w")
     file_formatter = logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
@@ -33,4 +33,11 @@ def setup_loggers(log_filename):
 
     file_logger.addHandler(file_handler)
 
-    return rich_logger, file_logger  # Return both loggers
\ No newline at end of file
+    # ─ Console Logger (Pretty Terminal Logging, propagates to the file logger) ─
+    logger = logging.getLogger(f"{log_filename}.console")
+    logger.setLevel(logging.INFO)
+
+    rich_handler = RichHandler(rich_tracebacks=True)
+    logger.addHandler(rich_handler)
+
+    return logger, file_logger  # Return both loggers